@@ -1,104 +1,146 @@
 #!/usr/bin/env python3
 """
 Script to read all blog posts and prepare them for manual tagging analysis.
-Outputs a JSON file with post contents for review.
+Streams post contents for review to a JSON or JSONL file.
 """
 
-import os
 import re
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Sequence
 
+from corpus import Post, list_post_folders, read_header, read_post
+from profiling import PROFILER, add_profile_arguments, session
 
-def is_date_folder(folder_name):
-    """Check if folder name matches date-title pattern."""
-    return bool(re.match(r'^\d{4}-\d{2}-\d{2}-', folder_name))
 
+# Fields available for export, in output order
+ALL_FIELDS = ('folder', 'title', 'description', 'date', 'body_preview', 'full_body', 'file_path')
 
-def extract_post_info(file_path: Path) -> Dict:
-    """Extract all relevant information from a blog post."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+# Fields only exported when asked for
+EXTRA_FIELDS = ('tags',)
 
-    # Extract front matter and body
-    parts = content.split('---', 2)
-    if len(parts) < 3:
+# Fields that need the cleaned body
+BODY_FIELDS = {'body_preview', 'full_body'}
+
+IMAGE_RE = re.compile(r'!\[.*?\]\(.*?\)')
+LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+SHORTCODE_RE = re.compile(r'{{<.*?>}}')
+
+
+def clean_body(body: str) -> str:
+    """Clean body - remove images, links, keep text."""
+    body_clean = IMAGE_RE.sub('', body.strip())
+    body_clean = LINK_RE.sub(r'\1', body_clean)
+    return SHORTCODE_RE.sub('', body_clean)
+
+
+def extract_post_info(post: Post, fields: Optional[Sequence[str]] = None) -> Dict:
+    """Extract the requested fields (all by default) from a blog post.
+
+    A Header from read_header works too when no body fields are requested.
+    """
+    if post is None or not post.has_front_matter:
         return None
 
-    front_matter = parts[1]
-    body = parts[2].strip()
-
-    # Extract title
-    title_match = re.search(r'title:\s*["\']?([^"\']+)["\']?', front_matter)
-    title = title_match.group(1) if title_match else ''
-
-    # Extract description
-    desc_match = re.search(r'description:\s*["\']?([^"\']+)["\']?', front_matter)
-    description = desc_match.group(1) if desc_match else ''
-
-    # Extract date
-    date_match = re.search(r'date:\s*([^\n]+)', front_matter)
-    date = date_match.group(1).strip() if date_match else ''
-
-    # Clean body - remove images, links, keep text
-    body_clean = re.sub(r'!\[.*?\]\(.*?\)', '', body)
-    body_clean = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', body_clean)
-    body_clean = re.sub(r'{{<.*?>}}', '', body_clean)
-
-    # Get first ~500 chars of body for preview
-    body_preview = body_clean[:800].strip()
-
-    return {
-        'folder': file_path.parent.name,
-        'title': title,
-        'description': description,
-        'date': date,
-        'body_preview': body_preview,
-        'full_body': body_clean,
-        'file_path': str(file_path)
+    fields = fields or ALL_FIELDS
+    body_clean = ''
+    if BODY_FIELDS.intersection(fields):
+        with PROFILER.stage('clean_body'):
+            body_clean = clean_body(post.body)
+
+    getters = {
+        'folder': lambda: post.name,
+        'title': lambda: post.title,
+        'description': lambda: post.description,
+        'date': lambda: post.date,
+        # Get first ~800 chars of body for preview
+        'body_preview': lambda: body_clean[:800].strip(),
+        'full_body': lambda: body_clean,
+        'file_path': lambda: str(post.index_file),
+        'tags': lambda: post.tags,
     }
+    return {name: getters[name]() for name in fields}
 
 
-def collect_all_posts(blog_dir: str) -> List[Dict]:
-    """Collect information from all blog posts."""
+def iter_post_info(blog_dir: str, fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """Yield post information one post at a time."""
     blog_path = Path(blog_dir)
-    posts = []
 
-    folders = [f for f in sorted(blog_path.iterdir())
-               if f.is_dir() and is_date_folder(f.name)]
+    # Bodies are only loaded when a body field is requested
+    needs_body = BODY_FIELDS.intersection(fields or ALL_FIELDS)
+    reader = read_post if needs_body else read_header
 
-    for folder in folders:
+    for folder in list_post_folders(blog_path):
         index_file = folder / 'index.md'
         if not index_file.exists():
             continue
 
         try:
-            post_info = extract_post_info(index_file)
+            with PROFILER.post(folder.name):
+                post_info = extract_post_info(reader(index_file), fields)
             if post_info:
-                posts.append(post_info)
+                yield post_info
         except Exception as e:
             print(f"Error processing {folder.name}: {e}")
 
-    return posts
 
+def collect_all_posts(blog_dir: str) -> List[Dict]:
+    """Collect information from all blog posts."""
+    return list(iter_post_info(blog_dir))
 
-if __name__ == '__main__':
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
 
-    print("Collecting all blog posts...")
-    posts = collect_all_posts(blog_dir)
+def export_posts(blog_dir: str, output_file: str,
+                 fields: Optional[Sequence[str]] = None) -> int:
+    """Stream posts to a .jsonl file (one post per line) or a JSON array.
 
-    print(f"\nFound {len(posts)} blog posts")
-    print("\nFirst 5 posts:")
-    for i, post in enumerate(posts[:5]):
-        print(f"\n{i+1}. {post['title']}")
-        print(f"   Date: {post['date']}")
-        print(f"   Preview: {post['body_preview'][:100]}...")
+    Each post is written as soon as it is parsed, so memory stays flat.
+    """
+    jsonl = output_file.endswith('.jsonl')
+    count = 0
 
-    # Save to JSON for analysis
-    output_file = 'blog_posts_analysis.json'
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(posts, f, indent=2, ensure_ascii=False)
+        if not jsonl:
+            f.write('[')
+
+        for post_info in iter_post_info(blog_dir, fields):
+            if jsonl:
+                f.write(json.dumps(post_info, ensure_ascii=False))
+                f.write('\n')
+            else:
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(post_info, indent=2, ensure_ascii=False))
+            count += 1
+
+        if not jsonl:
+            f.write('\n]\n')
+
+    return count
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--output', default='blog_posts_analysis.json',
+                        help='output file, .jsonl for one JSON object per line')
+    parser.add_argument('--fields',
+                        help=f'comma-separated fields to export (default: all of {",".join(ALL_FIELDS)}, '
+                             f'extra: {",".join(EXTRA_FIELDS)})')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    fields = None
+    if args.fields:
+        fields = [name.strip() for name in args.fields.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in ALL_FIELDS + EXTRA_FIELDS]
+        if unknown:
+            parser.error(f"Unknown fields: {', '.join(unknown)}")
+
+    print("Collecting all blog posts...")
+    with session(args, 'analyze_and_tag'):
+        count = export_posts(args.blog_dir, args.output, fields)
 
-    print(f"\n\nSaved all posts to {output_file}")
+    print(f"\nFound {count} blog posts")
+    print(f"\n\nSaved all posts to {args.output}")
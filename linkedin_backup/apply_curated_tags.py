@@ -4,58 +4,49 @@ Apply curated tags from blog_tags_mapping.json to all blog posts.
 """
 
 import json
-import re
 from pathlib import Path
+from typing import Optional
 
+from atomic_writer import BatchWriter, journal_path
+from catalog import CATALOG_FILE, front_matters, open_catalog, sync_catalog
+from corpus import Header, read_header, set_tags_line, write_header
+from profiling import PROFILER, add_profile_arguments, session
 
-def update_tags_in_file(file_path: Path, new_tags: list) -> bool:
-    """Update the tags in a blog post file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    parts = content.split('---', 2)
-    if len(parts) < 3:
+def topics_front_matter(front_matter: str, new_tags: list) -> str:
+    """Set the curated topics list in a front matter block."""
+    # Format topics as YAML list
+    topics_str = ', '.join([f'"{tag}"' for tag in new_tags])
+    return set_tags_line(front_matter, f'topics: [{topics_str}]')
+
+
+def update_tags_in_file(header: Header, new_tags: list,
+                        writer: Optional[BatchWriter] = None) -> bool:
+    """Update the tags in a blog post file."""
+    if header is None:
         print(f"  ⚠️  Invalid front matter format")
         return False
 
-    front_matter = parts[1]
-    body = parts[2]
-
-    # Format topics as YAML list
-    topics_str = ', '.join([f'"{tag}"' for tag in new_tags])
-    topics_line = f'topics: [{topics_str}]'
-
-    # Replace existing tags/topics
-    if re.search(r'(tags|topics):', front_matter):
-        front_matter = re.sub(
-            r'(tags|topics):\s*\[.*?\]',
-            topics_line,
-            front_matter,
-            flags=re.DOTALL
-        )
-    else:
-        # Add topics after description or at the end
-        if 'description:' in front_matter:
-            lines = front_matter.split('\n')
-            new_lines = []
-            for line in lines:
-                new_lines.append(line)
-                if line.strip().startswith('description:'):
-                    new_lines.append(topics_line)
-            front_matter = '\n'.join(new_lines)
-        else:
-            front_matter = front_matter.rstrip() + f'\n{topics_line}\n'
-
-    # Reconstruct file
-    new_content = f"---{front_matter}---{body}"
-
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+    # Rewrite only the header bytes, and only if the topics changed
+    write_header(header, topics_front_matter(header.front_matter, new_tags), writer)
 
     return True
 
 
-def apply_tags(mapping_file: str, blog_dir: str):
+def up_to_date_posts(catalog_file, blog_dir: str, mapping_file: str, tag_mapping) -> set:
+    """Folders whose cached front matter already carries their curated topics."""
+    conn = open_catalog(catalog_file)
+    try:
+        sync_catalog(conn, blog_dir, mapping_file=mapping_file)
+        cached = front_matters(conn, tag_mapping)
+    finally:
+        conn.close()
+    return {folder for folder, front_matter in cached.items()
+            if front_matter is not None
+            and topics_front_matter(front_matter, tag_mapping[folder]) == front_matter}
+
+
+def apply_tags(mapping_file: str, blog_dir: str, resume: bool = True, catalog_file=None):
     """Apply tags from mapping file to all blog posts."""
 
     # Load tag mapping
@@ -66,39 +57,75 @@ def apply_tags(mapping_file: str, blog_dir: str):
     updated = 0
     skipped = 0
     errors = 0
+    current = 0
+
+    # With the catalog, posts that already match are not even opened
+    up_to_date = set()
+    if catalog_file:
+        up_to_date = up_to_date_posts(catalog_file, blog_dir, mapping_file, tag_mapping)
 
     print(f"Applying curated tags to blog posts...\n")
 
-    for folder_name, tags in tag_mapping.items():
-        folder = blog_path / folder_name
-        index_file = folder / 'index.md'
-
-        if not index_file.exists():
-            print(f"⚠️  File not found: {folder_name}")
-            skipped += 1
-            continue
-
-        try:
-            if update_tags_in_file(index_file, tags):
-                print(f"✅ {folder_name}")
-                print(f"   Tags: {tags}")
-                updated += 1
-            else:
-                print(f"❌ Failed: {folder_name}")
+    with BatchWriter(journal_path('apply_curated_tags'), resume=resume) as writer:
+        if writer.resumed:
+            print(f"Resuming interrupted run: {len(writer.resumed)} posts already done\n")
+
+        for folder_name, tags in tag_mapping.items():
+            folder = blog_path / folder_name
+            index_file = folder / 'index.md'
+
+            if writer.is_done(index_file):
+                continue
+
+            if folder_name in up_to_date:
+                current += 1
+                continue
+
+            if not index_file.exists():
+                print(f"⚠️  File not found: {folder_name}")
+                skipped += 1
+                continue
+
+            try:
+                with PROFILER.post(folder_name):
+                    applied = update_tags_in_file(read_header(index_file), tags, writer)
+                if applied:
+                    print(f"✅ {folder_name}")
+                    print(f"   Tags: {tags}")
+                    updated += 1
+                    writer.mark_done(index_file)
+                else:
+                    print(f"❌ Failed: {folder_name}")
+                    errors += 1
+            except Exception as e:
+                print(f"❌ Error: {folder_name} - {e}")
                 errors += 1
-        except Exception as e:
-            print(f"❌ Error: {folder_name} - {e}")
-            errors += 1
 
     print(f"\n{'='*60}")
     print(f"Updated: {updated} posts")
     print(f"Skipped: {skipped} posts")
     print(f"Errors: {errors} posts")
+    if catalog_file:
+        print(f"Already up to date: {current} posts")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    mapping_file = '/Users/oscarcortez/Documents/code/others/personal_site/blog_tags_mapping.json'
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
-
-    apply_tags(mapping_file, blog_dir)
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('mapping_file', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/blog_tags_mapping.json')
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--restart', action='store_true',
+                        help='start over instead of resuming an interrupted run')
+    parser.add_argument('--catalog', nargs='?', const=str(CATALOG_FILE),
+                        help='only touch posts whose topics differ, using the SQLite catalog '
+                             f'(default file: {CATALOG_FILE})')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'apply_curated_tags'):
+        apply_tags(args.mapping_file, args.blog_dir, resume=not args.restart,
+                   catalog_file=args.catalog)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Atomic, change-only file writer shared by the mutating scripts.
+Files are written through a temp file and rename, identical content is
+skipped, and a journal lets an interrupted run resume where it stopped.
+"""
+
+import json
+import os
+import stat
+from pathlib import Path
+from typing import Optional
+
+from manifest import CACHE_DIR, content_digest
+from profiling import PROFILER
+
+
+def journal_path(script_name: str) -> Path:
+    """Default journal location for a script."""
+    return CACHE_DIR / f'{script_name}_journal.jsonl'
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f'.{path.name}.tmp')
+
+
+def _fsync_dir(directory: Path):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_mode(source: Path, target: Path):
+    # shutil.copymode, without importing shutil on every cached run
+    os.chmod(target, stat.S_IMODE(os.stat(source).st_mode))
+
+
+def _read_bytes(path: Path) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_if_changed(path, data: bytes, fsync: bool = True) -> bool:
+    """Atomically replace a file unless it already holds exactly these bytes."""
+    path = Path(path)
+    current = _read_bytes(path)
+    if current == data:
+        return False
+
+    with PROFILER.stage('write'):
+        tmp = _tmp_path(path)
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        if current is not None:
+            _copy_mode(path, tmp)
+        os.replace(tmp, path)
+        if fsync:
+            _fsync_dir(path.parent)
+    PROFILER.written(len(data))
+    return True
+
+
+class BatchWriter:
+    """Stages changed files and commits them in batches.
+
+    Each flush fsyncs the staged temp files, renames them over the originals,
+    fsyncs their directories once and appends the finished posts to the
+    journal, with the stat and hash they were left with. A journal left
+    behind by an interrupted run is loaded into `resumed` so callers can skip
+    posts that were already done and not edited since.
+    """
+
+    def __init__(self, journal_file=None, batch_size: int = 64, fsync: bool = True,
+                 resume: bool = True):
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.written = 0
+        self.identical = 0
+        self.resumed = {}
+        self._staged = []
+        self._done = []
+        self._journal = None
+        self._journal_file = Path(journal_file) if journal_file else None
+
+        if self._journal_file is None:
+            return
+
+        if resume and self._journal_file.exists():
+            with open(self._journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.resumed[entry['done']] = {key: entry[key]
+                                                       for key in ('mtime_ns', 'size', 'sha256')}
+                    except (ValueError, KeyError):
+                        # Torn last line from the interruption
+                        continue
+
+        self._journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self._journal = open(self._journal_file, 'a' if resume else 'w', encoding='utf-8')
+
+    def is_done(self, path) -> bool:
+        """Check if an interrupted run finished this path and it still holds
+        what that run left behind."""
+        entry = self.resumed.get(os.path.abspath(path))
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_mtime_ns == entry['mtime_ns'] and st.st_size == entry['size']:
+            return True
+        if st.st_size != entry['size']:
+            return False
+        # Touched but same size - fall back to the content hash
+        return content_digest(_read_bytes(Path(path)) or b'') == entry['sha256']
+
+    def done_digest(self, path) -> Optional[str]:
+        """Content hash an interrupted run left this path with, if it still holds."""
+        if not self.is_done(path):
+            return None
+        return self.resumed[os.path.abspath(path)]['sha256']
+
+    def write(self, path, data: bytes) -> bool:
+        """Stage new content for a file; returns False if it is unchanged."""
+        path = Path(path)
+        current = _read_bytes(path)
+        if current == data:
+            self.identical += 1
+            return False
+
+        # A second write to the same file must land after the first
+        if any(staged_path == path for _, staged_path, _ in self._staged):
+            self.flush()
+
+        with PROFILER.stage('write'):
+            tmp = _tmp_path(path)
+            f = open(tmp, 'wb')
+            f.write(data)
+            f.flush()
+            if current is not None:
+                _copy_mode(path, tmp)
+        PROFILER.written(len(data))
+        self._staged.append((tmp, path, f))
+
+        if len(self._staged) >= self.batch_size:
+            self.flush()
+        return True
+
+    def mark_done(self, path, digest: Optional[str] = None):
+        """Record that a path is fully processed, once its write is committed.
+
+        digest is the hash of the content it was left with; without it the
+        file is hashed when the journal entry is written.
+        """
+        self._done.append((os.path.abspath(path), digest))
+        if len(self._done) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Commit staged files and journal entries."""
+        with PROFILER.stage('flush'):
+            self._flush()
+
+    def _flush(self):
+        for _, _, f in self._staged:
+            if self.fsync:
+                os.fsync(f.fileno())
+            f.close()
+
+        directories = set()
+        for tmp, path, _ in self._staged:
+            os.replace(tmp, path)
+            directories.add(path.parent)
+        self.written += len(self._staged)
+        self._staged = []
+
+        if self.fsync:
+            for directory in directories:
+                _fsync_dir(directory)
+
+        if self._journal and self._done:
+            for path, digest in self._done:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if digest is None:
+                    digest = content_digest(_read_bytes(Path(path)) or b'')
+                entry = {'done': path, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                         'sha256': digest}
+                self._journal.write(json.dumps(entry) + '\n')
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+        self._done = []
+
+    def close(self, completed: bool = True):
+        """Flush everything; a completed run removes its journal."""
+        self.flush()
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+            if completed:
+                self._journal_file.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Staged files are complete, so commit them even on Ctrl-C
+        self.close(completed=exc_type is None)
+        return False
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Benchmark the linkedin_backup scripts on synthetic blog corpora.
+Generates page-bundle trees of 1k, 10k and 100k posts, times each script's
+entry function cold and warm in a fresh process with its own cache
+directory, records peak memory of that process and of its largest pool
+worker, and compares the results with saved baselines.
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import manifest
+from tag_blog_posts import TAG_KEYWORDS
+
+
+BENCH_DIR = manifest.CACHE_DIR / 'benchmark'
+BASELINE_FILE = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+SIZES = (1000, 10000, 100000)
+
+# Allowed slowdown or memory growth over the baseline
+DEFAULT_THRESHOLD = 0.25
+
+# Timings this close to the baseline are noise, whatever the ratio
+MIN_DELTA_SECONDS = 0.05
+
+# Each benchmark runs this many times and keeps the best result
+DEFAULT_REPEAT = 3
+
+# Body sizes roughly follow the real archive: median ~1.4 KB, long tail
+BODY_MEDIAN = 1400
+BODY_SIGMA = 0.7
+BODY_MAX = 20000
+
+FILLER_WORDS = (
+    'the', 'data', 'engineers', 'project', 'results', 'team', 'simple', 'approach',
+    'production', 'model', 'analysis', 'time', 'work', 'example', 'question', 'tool',
+    'better', 'learn', 'start', 'code', 'result', 'value', 'problem', 'solution',
+)
+TOPICS = sorted(TAG_KEYWORDS)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(6, 16))]
+    # Sprinkle in keywords so the tagger has matches to find
+    for _ in range(rng.randint(0, 2)):
+        words.insert(rng.randrange(len(words)), rng.choice(TAG_KEYWORDS[rng.choice(TOPICS)]))
+    return ' '.join(words).capitalize() + '.'
+
+
+def _body(rng: random.Random, with_artifacts: bool) -> str:
+    target = min(int(rng.lognormvariate(0, BODY_SIGMA) * BODY_MEDIAN), BODY_MAX)
+    lines = []
+    size = 0
+    while size < target:
+        line = _sentence(rng)
+        if with_artifacts:
+            # The LinkedIn quoting fix_blog_formatting cleans up
+            line = rng.choice((line, f'"{line}"', f'{line}"', '""', line))
+        lines.append(line)
+        lines.append('')
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+
+def render_post(rng: random.Random, date: datetime) -> str:
+    """A synthetic index.md like the imported LinkedIn posts."""
+    title = _sentence(rng)[:60].rstrip('.')
+    description = _sentence(rng)
+    if rng.random() < 0.1:
+        # The trailing escaped quote fix_titles removes: title: "text\""
+        title = f'{title}\\"'
+    topics = ''
+    if rng.random() < 0.6:
+        chosen = rng.sample(TOPICS, rng.randint(1, 4))
+        key = 'topics' if rng.random() < 0.8 else 'tags'
+        topics = f"{key}: [{', '.join(f'{chr(34)}{tag}{chr(34)}' for tag in chosen)}]\n"
+    return (
+        "--- \n"
+        f'title: "{title}"\n'
+        f"date: {date:%Y-%m-%dT%H:%M:00}\n"
+        "draft: false\n"
+        f'description: "{description}"\n'
+        f"{topics}"
+        "---\n\n"
+        f"{_body(rng, with_artifacts=rng.random() < 0.3)}\n\n"
+        "{{< subscription >}}\n"
+    )
+
+
+def generate_corpus(root: Path, size: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Write size synthetic bundles under root; returns a curated tag mapping."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    start = datetime(2020, 1, 1, 9, 0)
+    mapping = {}
+    for i in range(size):
+        date = start + timedelta(hours=7 * i)
+        folder = root / f'{date:%Y-%m-%d}-synthetic-post-{i}'
+        folder.mkdir()
+        with open(folder / 'index.md', 'w', encoding='utf-8') as f:
+            f.write(render_post(rng, date))
+        mapping[folder.name] = rng.sample(TOPICS, rng.randint(1, 3))
+    return mapping
+
+
+def pristine_corpus(size: int, seed: int = 0) -> Path:
+    """Generated corpus for a size, built once and reused across runs."""
+    root = BENCH_DIR / f'corpus-{size}-{seed}'
+    if not (root / 'mapping.json').exists():
+        shutil.rmtree(root, ignore_errors=True)
+        mapping = generate_corpus(root / 'blog', size, seed)
+        with open(root / 'mapping.json', 'w', encoding='utf-8') as f:
+            json.dump(mapping, f)
+    return root
+
+
+def _entry(name: str, blog_dir: str, mapping_file: str, jobs: int):
+    """Call one script's entry function."""
+    if name == 'fix_blog_formatting':
+        import fix_blog_formatting
+        fix_blog_formatting.process_blog_posts(blog_dir, jobs=jobs)
+    elif name == 'fix_titles':
+        import fix_titles
+        fix_titles.fix_all_titles(blog_dir)
+    elif name == 'tag_blog_posts':
+        import tag_blog_posts
+        tag_blog_posts.process_blog_posts(blog_dir, jobs=jobs)
+    elif name == 'apply_curated_tags':
+        import apply_curated_tags
+        apply_curated_tags.apply_tags(mapping_file, blog_dir, resume=False)
+    elif name == 'analyze_and_tag':
+        import analyze_and_tag
+        analyze_and_tag.export_posts(blog_dir, str(Path(blog_dir).parent / 'export.jsonl'))
+
+
+SCRIPTS = ('fix_blog_formatting', 'fix_titles', 'tag_blog_posts', 'apply_curated_tags',
+           'analyze_and_tag')
+
+
+def _measure(name: str, blog_dir: str, mapping_file: str, cache_dir: str, jobs: int, queue):
+    """Child process: time a cold and a warm run and report peak memory."""
+    # Every *_FILE constant and default built from CACHE_DIR must see the
+    # benchmark's cache, so it is set before the child imports anything
+    if manifest.CACHE_DIR != Path(cache_dir):
+        raise RuntimeError(f"benchmark child uses {manifest.CACHE_DIR}, not {cache_dir}")
+
+    timings = {}
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for run in ('cold', 'warm'):
+            start = time.perf_counter()
+            _entry(name, blog_dir, mapping_file, jobs)
+            timings[run] = time.perf_counter() - start
+
+    # ru_maxrss is KB on Linux and bytes on macOS. For finished pool workers
+    # it is the largest single worker, not their sum.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    worker_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    queue.put({**timings, 'peak_bytes': peak, 'worker_peak_bytes': worker_peak})
+
+
+def run_benchmark(name: str, size: int, seed: int = 0, jobs: int = 1) -> Dict:
+    """Benchmark one script on a fresh copy of the synthetic corpus."""
+    pristine = pristine_corpus(size, seed)
+    work = BENCH_DIR / f'work-{size}'
+    shutil.rmtree(work, ignore_errors=True)
+    shutil.copytree(pristine / 'blog', work / 'blog')
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(
+        name, str(work / 'blog'), str(pristine / 'mapping.json'), str(work / 'cache'), jobs, queue))
+
+    # The spawned child inherits the environment and builds CACHE_DIR from it
+    previous = os.environ.get(manifest.CACHE_DIR_ENV)
+    os.environ[manifest.CACHE_DIR_ENV] = str(work / 'cache')
+    try:
+        process.start()
+    finally:
+        if previous is None:
+            del os.environ[manifest.CACHE_DIR_ENV]
+        else:
+            os.environ[manifest.CACHE_DIR_ENV] = previous
+    result = queue.get()
+    process.join()
+    shutil.rmtree(work, ignore_errors=True)
+
+    result['posts_per_second'] = size / result['cold'] if result['cold'] else None
+    return result
+
+
+def load_baseline(baseline_file) -> Optional[Dict]:
+    try:
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Regressions beyond the threshold, as report lines."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get('results', {}).get(key)
+        if not reference:
+            continue
+        for metric in ('cold', 'warm', 'peak_bytes', 'worker_peak_bytes'):
+            # Baselines from before worker memory was recorded lack it
+            if metric not in reference:
+                continue
+            limit = reference[metric] * (1 + threshold)
+            if not metric.endswith('peak_bytes'):
+                limit = max(limit, reference[metric] + MIN_DELTA_SECONDS)
+            if result[metric] > limit:
+                regressions.append(f"{key} {metric}: {result[metric]:.3f} > "
+                                   f"{reference[metric]:.3f} (+{threshold:.0%})")
+    return regressions
+
+
+def best_of(name: str, size: int, repeat: int, jobs: int = 1) -> Dict:
+    """Lowest time and memory over several runs, to keep noise out."""
+    runs = [run_benchmark(name, size, jobs=jobs) for _ in range(max(1, repeat))]
+    return {metric: min(run[metric] for run in runs) if metric != 'posts_per_second'
+            else max(run[metric] for run in runs) for metric in runs[0]}
+
+
+def benchmark(sizes=SIZES, scripts=SCRIPTS, jobs: int = 1, repeat: int = DEFAULT_REPEAT,
+              baseline_file=BASELINE_FILE,
+              threshold: float = DEFAULT_THRESHOLD, update_baseline: bool = False,
+              output: Optional[str] = None) -> bool:
+    """Run the suite; returns False if anything regressed."""
+    results = {}
+    for size in sizes:
+        for name in scripts:
+            key = f'{name}/{size}'
+            result = best_of(name, size, repeat, jobs)
+            results[key] = result
+            print(f"⏱️  {key:32s} cold {result['cold']:8.3f}s  warm {result['warm']:8.3f}s  "
+                  f"peak {result['peak_bytes'] / 1024 / 1024:7.1f} MB  "
+                  f"worker {result['worker_peak_bytes'] / 1024 / 1024:7.1f} MB  "
+                  f"{result['posts_per_second']:10.0f} posts/s")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'jobs': jobs,
+        'repeat': repeat,
+        'results': results,
+    }
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    baseline = load_baseline(baseline_file)
+    regressions = compare(results, baseline, threshold) if baseline else []
+
+    print(f"\n{'='*60}")
+    if update_baseline or baseline is None:
+        if baseline is not None:
+            # Keep baselines for sizes or scripts that were not run this time
+            report['results'] = {**baseline.get('results', {}), **results}
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {baseline_file}")
+    elif regressions:
+        print(f"❌ {len(regressions)} regressions:")
+        for line in regressions:
+            print(f"  • {line}")
+    else:
+        print(f"✅ No regressions beyond {threshold:.0%}")
+    print(f"{'='*60}")
+
+    return not regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help='comma-separated corpus sizes')
+    parser.add_argument('--scripts', default=','.join(SCRIPTS),
+                        help=f'comma-separated scripts, from {",".join(SCRIPTS)}')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='worker processes for scripts that support them')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='runs per benchmark, keeping the best')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE),
+                        help='baseline results to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed regression as a fraction, e.g. 0.25')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='save these results as the new baseline')
+    parser.add_argument('--output',
+                        help='also write this run\'s results to a JSON file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    scripts = [name.strip() for name in args.scripts.split(',') if name.strip()]
+    unknown = [name for name in scripts if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"Unknown scripts: {', '.join(unknown)}")
+
+    ok = benchmark(sizes, scripts, args.jobs, args.repeat, args.baseline, args.threshold,
+                   args.update_baseline, args.output)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Local SQLite catalog of the blog and the LinkedIn export.
+Holds posts with their front matter fields, tags, bundle assets, curated
+tags from blog_tags_mapping.json and Shares.csv rows, plus an FTS5 index
+over titles, descriptions and bodies. Syncs incrementally from file mtimes,
+so lookups are indexed queries instead of scans of content/blog.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from corpus import list_post_folders, read_post
+from import_shares import iter_shares
+from manifest import CACHE_DIR
+from profiling import PROFILER, add_profile_arguments, session
+
+
+CATALOG_FILE = CACHE_DIR / 'catalog.sqlite'
+
+# Bump when the schema or what is stored changes; the catalog is rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE posts (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    dir_mtime_ns INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    date TEXT,
+    tags_key TEXT,
+    front_matter TEXT
+);
+CREATE INDEX posts_by_date ON posts(date);
+
+CREATE TABLE tags (
+    folder TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (folder, position)
+);
+CREATE INDEX tags_by_tag ON tags(tag, folder);
+
+CREATE TABLE curated (
+    folder TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (folder, position)
+);
+CREATE INDEX curated_by_tag ON curated(tag, folder);
+
+CREATE TABLE assets (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (folder, name)
+);
+
+CREATE TABLE shares (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    link TEXT,
+    commentary TEXT,
+    shared_url TEXT,
+    media_url TEXT,
+    blog TEXT
+);
+CREATE INDEX shares_by_date ON shares(date);
+
+CREATE TABLE sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+
+CREATE VIRTUAL TABLE posts_fts USING fts5(
+    title, description, body, tokenize = 'porter unicode61'
+);
+"""
+
+
+def open_catalog(db_file=CATALOG_FILE) -> sqlite3.Connection:
+    """Open the catalog, creating or rebuilding it for the current schema."""
+    Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'posts_fts_%'")]
+        with conn:
+            for table in tables:
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            conn.executescript(SCHEMA)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+
+def _source_changed(conn: sqlite3.Connection, path: Path) -> Optional[os.stat_result]:
+    """Stat of a source file if it changed since the last sync, else None."""
+    st = path.stat()
+    row = conn.execute('SELECT mtime_ns, size FROM sources WHERE path = ?',
+                       (str(path.resolve()),)).fetchone()
+    if row == (st.st_mtime_ns, st.st_size):
+        return None
+    return st
+
+
+def _record_source(conn: sqlite3.Connection, path: Path, st: os.stat_result):
+    conn.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)',
+                 (str(path.resolve()), st.st_mtime_ns, st.st_size))
+
+
+def _delete_post(conn: sqlite3.Connection, post_id: int, folder: str):
+    conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+    conn.execute('DELETE FROM posts_fts WHERE rowid = ?', (post_id,))
+    conn.execute('DELETE FROM tags WHERE folder = ?', (folder,))
+    conn.execute('DELETE FROM assets WHERE folder = ?', (folder,))
+
+
+def _sync_post(conn: sqlite3.Connection, folder: Path, st: os.stat_result,
+               dir_mtime_ns: int, post_id: Optional[int]):
+    post = read_post(folder / 'index.md')
+    fields = (st.st_mtime_ns, st.st_size, dir_mtime_ns, post.title, post.description,
+              post.date, post.tags_key, post.front_matter)
+    if post_id is None:
+        post_id = conn.execute(
+            'INSERT INTO posts (folder, mtime_ns, size, dir_mtime_ns, title, description, date, '
+            'tags_key, front_matter) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (folder.name,) + fields).lastrowid
+    else:
+        conn.execute(
+            'UPDATE posts SET mtime_ns = ?, size = ?, dir_mtime_ns = ?, title = ?, description = ?, '
+            'date = ?, tags_key = ?, front_matter = ? WHERE id = ?', fields + (post_id,))
+        conn.execute('DELETE FROM posts_fts WHERE rowid = ?', (post_id,))
+
+    body = post.body if post.has_front_matter else post.content
+    conn.execute('INSERT INTO posts_fts (rowid, title, description, body) VALUES (?, ?, ?, ?)',
+                 (post_id, post.title if post.has_front_matter else '',
+                  post.description if post.has_front_matter else '', body))
+
+    conn.execute('DELETE FROM tags WHERE folder = ?', (folder.name,))
+    conn.executemany('INSERT OR IGNORE INTO tags VALUES (?, ?, ?)',
+                     [(folder.name, i, tag) for i, tag in enumerate(post.tags)])
+
+
+def _sync_assets(conn: sqlite3.Connection, folder: Path):
+    conn.execute('DELETE FROM assets WHERE folder = ?', (folder.name,))
+    with os.scandir(folder) as entries:
+        rows = [(folder.name, entry.name, entry.stat().st_size) for entry in entries
+                if entry.is_file() and entry.name != 'index.md' and not entry.name.startswith('.')]
+    conn.executemany('INSERT INTO assets VALUES (?, ?, ?)', rows)
+
+
+def sync_posts(conn: sqlite3.Connection, blog_dir) -> Dict[str, int]:
+    """Bring posts, tags, assets and the full-text index up to date."""
+    counts = {'posts': 0, 'changed': 0, 'removed': 0, 'assets': 0}
+    known = {folder: (post_id, mtime_ns, size, dir_mtime_ns) for post_id, folder, mtime_ns, size, dir_mtime_ns
+             in conn.execute('SELECT id, folder, mtime_ns, size, dir_mtime_ns FROM posts')}
+
+    with conn:
+        for folder in list_post_folders(blog_dir):
+            try:
+                st = os.stat(folder / 'index.md')
+                dir_mtime_ns = folder.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            counts['posts'] += 1
+
+            post_id, mtime_ns, size, old_dir_mtime_ns = known.pop(folder.name, (None, None, None, None))
+            if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                with PROFILER.stage('sync_post'):
+                    _sync_post(conn, folder, st, dir_mtime_ns, post_id)
+                counts['changed'] += 1
+            elif dir_mtime_ns != old_dir_mtime_ns:
+                conn.execute('UPDATE posts SET dir_mtime_ns = ? WHERE id = ?', (dir_mtime_ns, post_id))
+
+            # Adding, removing or renaming files updates the folder's mtime
+            if dir_mtime_ns != old_dir_mtime_ns:
+                _sync_assets(conn, folder)
+                counts['assets'] += 1
+
+        for folder, (post_id, *_) in known.items():
+            _delete_post(conn, post_id, folder)
+            counts['removed'] += 1
+
+    return counts
+
+
+def sync_shares(conn: sqlite3.Connection, shares_csv) -> Optional[int]:
+    """Reload Shares.csv rows if the file changed; returns the row count or None."""
+    path = Path(shares_csv)
+    st = _source_changed(conn, path)
+    if st is None:
+        return None
+    rows = [(share['id'], share['date'].isoformat(), share['link'], share['commentary'],
+             share['shared_url'], share['media_url'], share['blog'])
+            for share in iter_shares(path)]
+    with conn:
+        conn.execute('DELETE FROM shares')
+        conn.executemany('INSERT OR REPLACE INTO shares VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        _record_source(conn, path, st)
+    return len(rows)
+
+
+def sync_mapping(conn: sqlite3.Connection, mapping_file) -> Optional[int]:
+    """Reload curated tags if the mapping changed; returns the post count or None."""
+    path = Path(mapping_file)
+    st = _source_changed(conn, path)
+    if st is None:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        tag_mapping = json.load(f)
+    with conn:
+        conn.execute('DELETE FROM curated')
+        conn.executemany('INSERT OR IGNORE INTO curated VALUES (?, ?, ?)',
+                         [(folder, i, tag) for folder, tags in tag_mapping.items()
+                          for i, tag in enumerate(tags)])
+        _record_source(conn, path, st)
+    return len(tag_mapping)
+
+
+def sync_catalog(conn: sqlite3.Connection, blog_dir, shares_csv=None, mapping_file=None) -> Dict:
+    """Sync everything that is given; unchanged sources cost a stat each."""
+    with PROFILER.stage('sync'):
+        counts = sync_posts(conn, blog_dir)
+        if shares_csv and Path(shares_csv).exists():
+            counts['shares'] = sync_shares(conn, shares_csv)
+        if mapping_file and Path(mapping_file).exists():
+            counts['curated'] = sync_mapping(conn, mapping_file)
+    return counts
+
+
+def fts_query(text: str) -> str:
+    """Search text as an FTS5 query of quoted terms, all of which must match.
+
+    Quoting keeps terms like gpt-4 or c++ from being read as FTS5 syntax.
+    """
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def search_posts(conn: sqlite3.Connection, query: str,
+                 without_tag: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(folder, title) of posts containing every term of query, best first,
+    optionally only those missing a tag."""
+    query = fts_query(query)
+    if not query:
+        return []
+    sql = ('SELECT p.folder, p.title FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid '
+           'WHERE posts_fts MATCH ?')
+    params = [query]
+    if without_tag:
+        sql += ' AND p.folder NOT IN (SELECT folder FROM tags WHERE tag = ?)'
+        params.append(without_tag)
+    return conn.execute(sql + ' ORDER BY rank', params).fetchall()
+
+
+def tag_counts(conn: sqlite3.Connection, table: str = 'tags') -> List[Tuple[str, int]]:
+    """Posts per tag in the front matter ('tags') or the mapping ('curated')."""
+    if table not in ('tags', 'curated'):
+        raise ValueError(f"Unknown tag table: {table}")
+    return conn.execute(f'SELECT tag, COUNT(*) FROM {table} GROUP BY tag '
+                        'ORDER BY COUNT(*) DESC, tag').fetchall()
+
+
+def front_matters(conn: sqlite3.Connection, folders) -> Dict[str, Optional[str]]:
+    """Cached front matter of posts by folder, for posts in the catalog."""
+    folders = list(folders)
+    result = {}
+    # Stay under SQLite's limit on bound parameters
+    for start in range(0, len(folders), 500):
+        chunk = folders[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        result.update(conn.execute(
+            f'SELECT folder, front_matter FROM posts WHERE folder IN ({placeholders})', chunk))
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--shares', default=f'{site_dir}/linkedin_backup/Shares.csv',
+                        help='Shares.csv to catalog')
+    parser.add_argument('--mapping', default=f'{site_dir}/blog_tags_mapping.json',
+                        help='curated blog_tags_mapping.json to catalog')
+    parser.add_argument('--db', default=str(CATALOG_FILE),
+                        help='catalog database file')
+    parser.add_argument('--search',
+                        help='FTS5 query over titles, descriptions and bodies, e.g. sarimax')
+    parser.add_argument('--without-tag',
+                        help='with --search, only posts missing this tag')
+    parser.add_argument('--tag-counts', choices=('tags', 'curated'),
+                        help='posts per front matter tag or per curated tag')
+    parser.add_argument('--sql',
+                        help='run a read-only SQL query against the catalog')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'catalog'):
+        conn = open_catalog(args.db)
+        counts = sync_catalog(conn, args.blog_dir, args.shares, args.mapping)
+
+        if args.search:
+            matches = search_posts(conn, args.search, args.without_tag)
+            for folder, title in matches:
+                print(f"🔍 {folder}: {title}")
+            print(f"\n{len(matches)} posts match {args.search!r}"
+                  + (f" without the {args.without_tag!r} tag" if args.without_tag else ''))
+
+        if args.tag_counts:
+            for tag, count in tag_counts(conn, args.tag_counts):
+                print(f"  • {tag:30s} ({count:3d} posts)")
+
+        if args.sql:
+            conn.execute('PRAGMA query_only = ON')
+            for row in conn.execute(args.sql):
+                print(' | '.join(str(value) for value in row))
+
+    print(f"\n{'='*60}")
+    print(f"Posts: {counts['posts']} ({counts['changed']} synced, {counts['removed']} removed, "
+          f"{counts['assets']} asset listings)")
+    for source in ('shares', 'curated'):
+        if source in counts:
+            state = 'unchanged' if counts[source] is None else f"{counts[source]} reloaded"
+            print(f"{source.capitalize()}: {state}")
+    print(f"Catalog: {args.db}")
+    print(f"{'='*60}")
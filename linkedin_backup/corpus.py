@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Shared loader for the blog post corpus used by the linkedin_backup scripts.
+Lists the date folders once and parses each index.md once into a Post record.
+"""
+
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from atomic_writer import BatchWriter, write_if_changed
+from profiling import PROFILER, profiled_map, timed_map
+
+
+DATE_FOLDER_RE = re.compile(r'^\d{4}-\d{2}-\d{2}-')
+
+# Front matter field patterns
+TITLE_RE = re.compile(r'title:\s*["\']?([^"\']+)["\']?')
+DESCRIPTION_RE = re.compile(r'description:\s*["\']?([^"\']+)["\']?')
+DATE_RE = re.compile(r'date:\s*([^\n]+)')
+# The list body cannot contain ']', so the match never runs past the list
+TAGS_RE = re.compile(r'(tags|topics):\s*\[([^\]]*)\]')
+TAGS_KEY_RE = re.compile(r'(tags|topics):')
+QUOTED_RE = re.compile(r'["\']([^"\']+)["\']')
+
+
+def is_date_folder(folder_name):
+    """Check if folder name matches date-title pattern (not numbered like 1_, 2_, etc)."""
+    return bool(DATE_FOLDER_RE.match(folder_name))
+
+
+def list_post_folders(blog_dir) -> List[Path]:
+    """List all date-titled post folders in sorted order."""
+    blog_path = Path(blog_dir)
+    with PROFILER.stage('list'), os.scandir(blog_path) as entries:
+        names = [entry.name for entry in entries
+                 if is_date_folder(entry.name) and entry.is_dir()]
+    return [blog_path / name for name in sorted(names)]
+
+
+class FrontMatterFields:
+    """Field accessors shared by records that carry a front_matter string."""
+    front_matter: Optional[str]
+
+    @property
+    def has_front_matter(self) -> bool:
+        return self.front_matter is not None
+
+    @property
+    def title(self) -> str:
+        return _search(TITLE_RE, self.front_matter)
+
+    @property
+    def description(self) -> str:
+        return _search(DESCRIPTION_RE, self.front_matter)
+
+    @property
+    def date(self) -> str:
+        return _search(DATE_RE, self.front_matter).strip()
+
+    @property
+    def tags_key(self) -> Optional[str]:
+        """Which of tags/topics holds the tag list, if any."""
+        tags_match = TAGS_RE.search(self.front_matter or '')
+        return tags_match.group(1) if tags_match else None
+
+    @property
+    def tags(self) -> List[str]:
+        """Current tags from the tags or topics field."""
+        if not self.front_matter:
+            return []
+        tags_match = TAGS_RE.search(self.front_matter)
+        if tags_match:
+            return QUOTED_RE.findall(tags_match.group(2))
+        return []
+
+
+@dataclass
+class Post(FrontMatterFields):
+    """A blog post read once from its index.md."""
+    folder: Path
+    index_file: Path
+    content: str
+    # None when the file has no valid front matter block
+    front_matter: Optional[str]
+    body: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return self.folder.name
+
+    def render(self) -> str:
+        """Reconstruct the file content from front matter and body."""
+        if self.front_matter is None:
+            return self.content
+        return f"---{self.front_matter}---{self.body}"
+
+
+@dataclass
+class Header(FrontMatterFields):
+    """Front matter of a post, read without loading the body."""
+    index_file: Path
+    front_matter: str
+    # Byte offset just past the closing '---', where the body starts
+    body_offset: int
+
+    @property
+    def name(self) -> str:
+        return self.index_file.parent.name
+
+
+def set_tags_line(front_matter: str, tags_line: str) -> str:
+    """Replace the tags/topics list, or add it after description or at the end."""
+    # Check if tags/topics already exist
+    if TAGS_KEY_RE.search(front_matter):
+        return TAGS_RE.sub(tags_line, front_matter)
+
+    if 'description:' in front_matter:
+        # Find description line and add tags after it
+        new_lines = []
+        for line in front_matter.split('\n'):
+            new_lines.append(line)
+            if line.strip().startswith('description:'):
+                new_lines.append(tags_line)
+        return '\n'.join(new_lines)
+
+    # Add at the end of front matter
+    return front_matter.rstrip() + f'\n{tags_line}\n'
+
+
+def _search(pattern, text) -> str:
+    if not text:
+        return ''
+    match = pattern.search(text)
+    return match.group(1) if match else ''
+
+
+def parse_post(index_file: Path, content: str) -> Post:
+    """Split file content into front matter and body."""
+    with PROFILER.stage('parse'):
+        parts = content.split('---', 2)
+    if len(parts) < 3:
+        return Post(index_file.parent, index_file, content, None, None)
+    return Post(index_file.parent, index_file, content, parts[1], parts[2])
+
+
+def read_post(index_file: Path) -> Post:
+    """Read and parse a post's index.md."""
+    with PROFILER.stage('read'), open(index_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+        PROFILER.read(os.fstat(f.fileno()).st_size)
+    return parse_post(index_file, content)
+
+
+def write_post(post: Post, content: str, writer: Optional[BatchWriter] = None) -> bool:
+    """Write new content for a post, atomically and only if it changed.
+
+    With a BatchWriter the write is staged and committed with its batch.
+    The record is kept in sync either way.
+    """
+    data = content.encode('utf-8')
+    if writer is not None:
+        changed = writer.write(post.index_file, data)
+    else:
+        changed = write_if_changed(post.index_file, data)
+    updated = parse_post(post.index_file, content)
+    post.content = updated.content
+    post.front_matter = updated.front_matter
+    post.body = updated.body
+    return changed
+
+
+def read_header(index_file: Path) -> Optional[Header]:
+    """Read only the front matter, streaming the file up to the closing '---'.
+
+    Splits the same way as content.split('---', 2), so the result matches
+    Post.front_matter. Returns None if the file has no front matter block.
+    """
+    buf = bytearray()
+    opening = -1
+
+    with PROFILER.stage('read_header'), open(index_file, 'rb') as f:
+        for line in f:
+            line_start = len(buf)
+            buf += line
+
+            if opening < 0:
+                opening = buf.find(b'---', line_start)
+                if opening < 0:
+                    continue
+
+            closing = buf.find(b'---', max(line_start, opening + 3))
+            if closing >= 0:
+                PROFILER.read(len(buf))
+                front_matter = buf[opening + 3:closing].decode('utf-8')
+                return Header(index_file, front_matter, closing + 3)
+
+    PROFILER.read(len(buf))
+    return None
+
+
+def write_header(header: Header, front_matter: str,
+                 writer: Optional[BatchWriter] = None) -> bool:
+    """Replace only the front matter, copying the body bytes through unparsed.
+
+    Nothing is written when the front matter is unchanged.
+    """
+    if front_matter == header.front_matter:
+        return False
+
+    index_file = header.index_file
+    header_bytes = f"---{front_matter}---".encode('utf-8')
+
+    if writer is not None:
+        with open(index_file, 'rb') as src:
+            src.seek(header.body_offset)
+            writer.write(index_file, header_bytes + src.read())
+    else:
+        tmp_file = index_file.with_name(f'.{index_file.name}.tmp')
+        with PROFILER.stage('write'):
+            with open(index_file, 'rb') as src, open(tmp_file, 'wb') as dst:
+                dst.write(header_bytes)
+                src.seek(header.body_offset)
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+                PROFILER.written(dst.tell())
+            shutil.copymode(index_file, tmp_file)
+            os.replace(tmp_file, index_file)
+
+    header.front_matter = front_matter
+    header.body_offset = len(header_bytes)
+    return True
+
+
+@dataclass
+class PostResult:
+    """Outcome of processing one post, reported back to the main process."""
+    folder_name: str
+    status: str
+    messages: List[str] = field(default_factory=list)
+    # Hash of the content left on disk, for the run manifest
+    digest: Optional[str] = None
+    # New content for the main process to write, if the post changed
+    content: Optional[str] = None
+
+
+def map_posts(func: Callable, items: Iterable, jobs: int = 1) -> Iterator:
+    """Apply func to each item, in a process pool when jobs > 1.
+
+    Results are yielded in input order so reports stay deterministic.
+    When profiling, each item's latency and the workers' counters are kept.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        yield from timed_map(func, items) if PROFILER.enabled else map(func, items)
+        return
+
+    # Imported here: the pool machinery alone costs more than a cached run
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if PROFILER.enabled:
+            yield from profiled_map(executor.map, func, items, chunksize=chunksize)
+        else:
+            yield from executor.map(func, items, chunksize=chunksize)
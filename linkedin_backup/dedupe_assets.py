@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Deduplicate images and documents shared between blog page bundles.
+Hashes every bundle asset in parallel, moves byte-identical copies into one
+file in a shared store and points each index.md at it. A copy whose
+references cannot all be rewritten stays in its bundle. Images that only
+look alike (close perceptual hashes) are reported, never rewritten.
+"""
+
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, map_posts
+from manifest import content_digest
+from profiling import add_profile_arguments, session
+
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# Congo looks these up as page resources by name, so they stay in the bundle
+PAGE_RESOURCE_RE = re.compile(r'(thumb|feature|cover)', re.IGNORECASE)
+# pdf_previews.py renders, shrinks and links these inside the bundle
+BUNDLE_FILES = ('attachment.pdf', 'attachment-preview.webp')
+
+# Public path of the shared store on the site
+URL_PREFIX = '/shared'
+
+DHASH_SIZE = 8
+
+# Images whose 64-bit dHashes differ in at most this many bits look alike
+SIMILAR_DISTANCE = 4
+
+
+def dhash(image: Image.Image) -> str:
+    """Difference hash: bright/dark gradients of a tiny grayscale copy."""
+    small = image.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = pixels[row * (DHASH_SIZE + 1) + col]
+            right = pixels[row * (DHASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f'{bits:016x}'
+
+
+def hash_asset(path: Path) -> Dict:
+    """Content hash, size and for images the perceptual hash of one asset."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    info = {'path': path, 'size': len(data), 'sha256': content_digest(data), 'dhash': None}
+
+    if path.suffix.lower() in IMAGE_SUFFIXES:
+        try:
+            with Image.open(path) as image:
+                info['dhash'] = dhash(image)
+        except Exception:
+            # Not decodable, so only byte-identical copies are found
+            pass
+    return info
+
+
+def list_assets(blog_path: Path) -> List[Path]:
+    """Every file in the post bundles other than index.md."""
+    assets = []
+    for folder in list_post_folders(blog_path):
+        with os.scandir(folder) as entries:
+            assets.extend(folder / entry.name for entry in entries
+                          if entry.is_file() and entry.name != 'index.md'
+                          and not entry.name.startswith('.'))
+    return sorted(assets)
+
+
+def group_identical(assets: List[Dict]) -> List[List[Dict]]:
+    """Groups of byte-identical assets."""
+    groups = {}
+    for asset in assets:
+        groups.setdefault(asset['sha256'], []).append(asset)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def similar_images(assets: List[Dict], max_distance: int = SIMILAR_DISTANCE) -> List[Tuple[Dict, Dict, int]]:
+    """Pairs of different images whose perceptual hashes are within max_distance bits."""
+    # One image per content hash; identical copies are handled separately
+    images = list({asset['sha256']: asset for asset in assets if asset['dhash']}.values())
+    pairs = []
+    for i, first in enumerate(images):
+        for second in images[i + 1:]:
+            distance = bin(int(first['dhash'], 16) ^ int(second['dhash'], 16)).count('1')
+            if distance <= max_distance:
+                pairs.append((first, second, distance))
+    return pairs
+
+
+def store_name(asset: Dict) -> str:
+    return f"{asset['sha256'][:16]}{asset['path'].suffix.lower()}"
+
+
+def rewrite_references(content: str, old_name: str, new_ref: str) -> str:
+    """Point links, images and shortcode arguments at new_ref instead of a
+    bundle file name, written bare or as ./name."""
+    pattern = re.compile(r'(?<=[(\"\'=])(?:\./)?' + re.escape(old_name) + r'(?=[)\"\'\s>]|$)',
+                         re.MULTILINE)
+    return pattern.sub(new_ref, content)
+
+
+def mentions(content: str, name: str) -> bool:
+    """Whether content still refers to a file name in any form."""
+    return re.search(r'(?<![\w-])' + re.escape(name) + r'(?![\w.-])', content) is not None
+
+
+def _movable(asset: Dict) -> bool:
+    name = asset['path'].name
+    return not PAGE_RESOURCE_RE.search(name) and name not in BUNDLE_FILES
+
+
+def _label(asset: Dict) -> str:
+    return f"{asset['path'].parent.name}/{asset['path'].name}"
+
+
+def dedupe_assets(blog_dir: str, store_dir: str, dry_run: bool = False, jobs: int = 1,
+                  max_distance: int = SIMILAR_DISTANCE):
+    """Move byte-identical bundle assets into the shared store."""
+    blog_path = Path(blog_dir)
+    store_path = Path(store_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    paths = list_assets(blog_path)
+    assets = list(map_posts(hash_asset, paths, jobs=jobs))
+    print(f"Hashed {len(assets)} assets\n")
+
+    stored = set(os.listdir(store_path)) if store_path.exists() else set()
+
+    # Single files already in the store from an earlier run count as duplicates too
+    groups = group_identical(assets)
+    grouped = {id(asset) for group in groups for asset in group}
+    groups.extend([asset] for asset in assets
+                  if id(asset) not in grouped and store_name(asset) in stored)
+
+    moved = 0
+    kept = 0
+    unresolved = 0
+    bytes_saved = 0
+
+    for group in groups:
+        name = store_name(group[0])
+        store_file = store_path / name
+        stored_before = name in stored
+        new_ref = f'{URL_PREFIX}/{name}'
+        names = ', '.join(_label(asset) for asset in group)
+
+        # Congo needs page resources inside the bundle, and Hugo publishes
+        # them per page anyway, so only other files can move. A file also
+        # stays when its index.md would still refer to it after the rewrite.
+        rewrites = []
+        stuck = 0
+        for asset in group:
+            if not _movable(asset):
+                continue
+            path = asset['path']
+            index_file = path.parent / 'index.md'
+            content = index_file.read_text(encoding='utf-8') if index_file.exists() else ''
+            rewritten = rewrite_references(content, path.name, new_ref)
+            if rewritten == content or mentions(rewritten, path.name):
+                print(f"⚠️  References to {_label(asset)} not all rewritable, kept in bundle")
+                stuck += 1
+                continue
+            rewrites.append((asset, index_file, rewritten))
+
+        unresolved += stuck
+
+        # Moving a single file into a new store copy saves nothing
+        if not rewrites or (len(rewrites) == 1 and not stored_before):
+            print(f"⏭️  {len(group)} identical, kept in bundles: {names}")
+            kept += len(group) - stuck
+            continue
+
+        print(f"🔍 {len(group)} identical: {names} -> {new_ref}")
+        kept += len(group) - len(rewrites) - stuck
+        bytes_saved += sum(asset['size'] for asset, _, _ in rewrites)
+        if not stored_before:
+            bytes_saved -= rewrites[0][0]['size']
+        moved += len(rewrites)
+
+        if dry_run:
+            continue
+
+        if not stored_before:
+            store_path.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(rewrites[0][0]['path'], store_file)
+            stored.add(name)
+
+        for asset, index_file, rewritten in rewrites:
+            write_if_changed(index_file, rewritten.encode('utf-8'))
+            asset['path'].unlink()
+
+    # Close perceptual matches may be different images (e.g. text slides
+    # on white), so they are only listed for a human to check
+    similar = similar_images(assets, max_distance)
+    for first, second, distance in similar:
+        print(f"👀 Look alike ({distance} bits apart): {_label(first)}, {_label(second)}")
+
+    print(f"\n{'='*60}")
+    print(f"Identical groups: {len(groups)}")
+    print(f"Moved to {URL_PREFIX}: {moved} files")
+    print(f"Kept in bundles (page resources, PDF attachments or single copies): {kept} files")
+    print(f"Kept with references that could not be rewritten: {unresolved} files")
+    print(f"Look-alike image pairs (not changed): {len(similar)}")
+    print(f"Bytes saved: {bytes_saved:,} ({bytes_saved / 1024 / 1024:.1f} MB)")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--store', default=f'{site_dir}/static/shared',
+                        help=f'shared store directory ({URL_PREFIX} on the site)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report duplicates without changing files')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    parser.add_argument('--max-distance', type=int, default=SIMILAR_DISTANCE,
+                        help='dHash bits two images may differ in to be reported as look-alikes')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print("🔍 DRY RUN MODE - No files will be modified\n")
+
+    with session(args, 'dedupe_assets'):
+        dedupe_assets(args.blog_dir, args.store, dry_run=args.dry_run, jobs=args.jobs,
+                      max_distance=args.max_distance)
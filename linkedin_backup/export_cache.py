@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Keep a typed, columnar Parquet cache of the LinkedIn export.
+Shares.csv and Rich_Media.csv are parsed once, with parsed dates and
+decoded commentary, into Parquet datasets. A fresh export adds a part file
+with its new rows and rewrites only the parts holding rows that were edited,
+and queries read just the columns they need instead of re-parsing the CSVs.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from import_shares import iter_shares
+from manifest import CACHE_DIR, RunManifest, rules_fingerprint
+from media_index import iter_media
+from profiling import PROFILER, add_profile_arguments, session
+
+
+EXPORT_CACHE = CACHE_DIR / 'export'
+
+SHARES_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('date', pa.timestamp('s')),
+    ('link', pa.string()),
+    ('commentary', pa.string()),
+    ('shared_url', pa.string()),
+    ('media_url', pa.string()),
+    ('blog', pa.string()),
+])
+
+MEDIA_SCHEMA = pa.schema([
+    ('key', pa.string()),
+    ('date', pa.timestamp('s')),
+    ('kind', pa.string()),
+    ('description', pa.string()),
+    ('link', pa.string()),
+])
+
+COMPRESSION = 'zstd'
+
+# Bump when iter_shares or iter_media parse rows differently
+SCHEMA_VERSION = '1'
+
+
+def media_key(item: Dict) -> str:
+    """Stable key of an upload; the signed query string of its link changes per export."""
+    return f"{item['date']:%Y-%m-%dT%H:%M} {item['link'].split('?', 1)[0]}"
+
+
+def _media_rows(csv_file) -> Iterable[Dict]:
+    for item in iter_media(csv_file):
+        yield {'key': media_key(item), **item}
+
+
+# name: (rows from the CSV, schema, key column)
+DATASETS: Dict[str, tuple] = {
+    'shares': (iter_shares, SHARES_SCHEMA, 'id'),
+    'media': (_media_rows, MEDIA_SCHEMA, 'key'),
+}
+
+
+def rules_version() -> str:
+    """Changes whenever parsing or the schemas change, forcing a rebuild."""
+    return rules_fingerprint(SCHEMA_VERSION, SHARES_SCHEMA.to_string(), MEDIA_SCHEMA.to_string())
+
+
+def dataset_dir(name: str, cache_dir=EXPORT_CACHE) -> Path:
+    return Path(cache_dir) / name
+
+
+def _write_part(path: Path, rows: List[Dict], schema: pa.Schema):
+    table = pa.Table.from_pylist(rows, schema=schema)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    pq.write_table(table, tmp, compression=COMPRESSION)
+    os.replace(tmp, path)
+    PROFILER.written(path.stat().st_size)
+
+
+def append_rows(folder: Path, rows: List[Dict], schema: pa.Schema) -> Path:
+    """Write rows as the next part file of a dataset."""
+    folder.mkdir(parents=True, exist_ok=True)
+    part = len(list(folder.glob('part-*.parquet')))
+    path = folder / f'part-{part:05d}.parquet'
+    _write_part(path, rows, schema)
+    return path
+
+
+def update_parts(folder: Path, rows: Dict[str, Dict], schema: pa.Schema, key_column: str):
+    """Rewrite the part files holding rows whose values changed in the source.
+
+    Returns the keys already in the dataset and how many rows were updated.
+    Rows no longer in the source are kept, as older exports may still have them.
+    """
+    seen = set()
+    updated = 0
+    for part in sorted(folder.glob('part-*.parquet')):
+        cached = pq.read_table(part).to_pylist()
+        current = [rows.get(row[key_column], row) for row in cached]
+        changed = sum(old != new for old, new in zip(cached, current))
+        if changed:
+            _write_part(part, current, schema)
+            updated += changed
+        seen.update(row[key_column] for row in cached)
+    return seen, updated
+
+
+def clear_cache(cache_dir: Path):
+    """Remove the datasets and state this tool owns, nothing else in cache_dir."""
+    for name in DATASETS:
+        shutil.rmtree(dataset_dir(name, cache_dir), ignore_errors=True)
+    for state in ('meta.json', 'sources.json'):
+        (cache_dir / state).unlink(missing_ok=True)
+
+
+def update_cache(sources: Dict[str, str], cache_dir=EXPORT_CACHE, rebuild: bool = False) -> Dict[str, Dict]:
+    """Bring each dataset in line with its source CSV.
+
+    Returns the rows added and updated per dataset.
+    """
+    cache_dir = Path(cache_dir)
+    version = rules_version()
+    meta_file = cache_dir / 'meta.json'
+
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            stale = json.load(f).get('rules_version') != version
+    except (OSError, ValueError):
+        stale = True
+    if rebuild or stale:
+        clear_cache(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Unchanged exports are not even parsed
+    manifest = RunManifest(cache_dir / 'sources.json', version)
+
+    counts = {}
+    for name, csv_file in sources.items():
+        if not csv_file or not Path(csv_file).exists():
+            continue
+        if manifest.is_unchanged(Path(csv_file)):
+            counts[name] = {'added': 0, 'updated': 0}
+            continue
+
+        read_rows, schema, key_column = DATASETS[name]
+        folder = dataset_dir(name, cache_dir)
+
+        with PROFILER.stage('parse'):
+            PROFILER.read(os.path.getsize(csv_file))
+            rows = {}
+            for row in read_rows(csv_file):
+                rows.setdefault(row[key_column], {column: row[column] for column in schema.names})
+
+        # Hand edits (e.g. the Blog column) change rows that are already cached
+        with PROFILER.stage('update'):
+            seen, updated = update_parts(folder, rows, schema, key_column)
+
+        new_rows = [row for key, row in rows.items() if key not in seen]
+        if new_rows:
+            with PROFILER.stage('write'):
+                append_rows(folder, new_rows, schema)
+        counts[name] = {'added': len(new_rows), 'updated': updated}
+        manifest.record(Path(csv_file), hash_content=False)
+
+    with open(meta_file, 'w', encoding='utf-8') as f:
+        json.dump({'rules_version': version}, f)
+    manifest.save()
+    return counts
+
+
+def read_columns(name: str, columns: Sequence[str], filter=None, cache_dir=EXPORT_CACHE) -> pa.Table:
+    """Only the given columns of a cached dataset, optionally filtered."""
+    folder = dataset_dir(name, cache_dir)
+    if not any(folder.glob('part-*.parquet')):
+        schema = DATASETS[name][1]
+        return pa.table({column: pa.array([], schema.field(column).type) for column in columns})
+    with PROFILER.stage('query'):
+        return ds.dataset(folder, format='parquet').to_table(columns=list(columns), filter=filter)
+
+
+def per_month(table: pa.Table) -> List[tuple]:
+    """(YYYY-MM, count) rows of a table with a date column, oldest first."""
+    if table.num_rows == 0:
+        return []
+    months = pc.strftime(table.column('date'), format='%Y-%m')
+    counts = pa.table({'month': months}).group_by('month').aggregate([('month', 'count')])
+    return sorted(zip(counts.column('month').to_pylist(), counts.column('month_count').to_pylist()))
+
+
+def shares_per_month(cache_dir=EXPORT_CACHE) -> List[tuple]:
+    return per_month(read_columns('shares', ['date'], cache_dir=cache_dir))
+
+
+def unblogged_per_month(cache_dir=EXPORT_CACHE) -> List[tuple]:
+    """Shares per month whose Blog column is not YES."""
+    return per_month(read_columns('shares', ['date'], filter=ds.field('blog') != 'YES',
+                                  cache_dir=cache_dir))
+
+
+def media_per_month(cache_dir=EXPORT_CACHE) -> List[tuple]:
+    return per_month(read_columns('media', ['date'], cache_dir=cache_dir))
+
+
+QUERIES: Dict[str, Callable] = {
+    'shares-per-month': shares_per_month,
+    'unblogged-per-month': unblogged_per_month,
+    'media-per-month': media_per_month,
+}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('shares_csv', nargs='?', default=f'{site_dir}/linkedin_backup/Shares.csv')
+    parser.add_argument('media_csv', nargs='?', default=f'{site_dir}/linkedin_backup/Rich_Media.csv')
+    parser.add_argument('--cache', default=str(EXPORT_CACHE),
+                        help='directory of the Parquet datasets')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='rebuild from the CSVs, e.g. after editing existing rows')
+    parser.add_argument('--query', choices=sorted(QUERIES),
+                        help='print a query over the cache after updating it')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'export_cache'):
+        counts = update_cache({'shares': args.shares_csv, 'media': args.media_csv},
+                             args.cache, rebuild=args.rebuild)
+        rows = QUERIES[args.query](args.cache) if args.query else None
+
+    if rows is not None:
+        print(f"{args.query}:")
+        for month, count in rows:
+            print(f"  {month}  {count:5d}  {'█' * min(count, 50)}")
+
+    print(f"\n{'='*60}")
+    for name in DATASETS:
+        folder = dataset_dir(name, args.cache)
+        parts = list(folder.glob('part-*.parquet'))
+        total = sum(pq.ParquetFile(part).metadata.num_rows for part in parts)
+        size = sum(part.stat().st_size for part in parts)
+        added = counts.get(name, {}).get('added', 0)
+        updated = counts.get(name, {}).get('updated', 0)
+        print(f"{name}: +{added} new rows, {updated} updated, {total} rows in {len(parts)} parts "
+              f"({size / 1024:.0f} KB)")
+    print(f"Saved cache to {args.cache}")
+    print(f"{'='*60}")
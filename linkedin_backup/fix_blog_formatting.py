@@ -4,66 +4,157 @@ Script to fix blog post formatting issues.
 Removes quotes from content lines and replaces "" with actual empty lines.
 """
 
+import mmap
 import os
 import re
 from pathlib import Path
 
+from atomic_writer import BatchWriter, journal_path
+from corpus import PostResult, list_post_folders, map_posts, read_post
+from manifest import RunManifest, content_digest, manifest_path
+from profiling import PROFILER, add_profile_arguments, session
 
-def is_date_folder(folder_name):
-    """Check if folder name matches date-title pattern (not numbered like 1_, 2_, etc)."""
-    # Pattern: starts with YYYY-MM-DD
-    return bool(re.match(r'^\d{4}-\d{2}-\d{2}-', folder_name))
 
+# Bump when fix_content_formatting changes so every post is rechecked
+RULES_VERSION = '1'
 
-def fix_content_formatting(content):
-    """Fix the formatting of blog post content."""
-    lines = content.split('\n')
-    fixed_lines = []
-    in_frontmatter = False
-    frontmatter_count = 0
-
-    for line in lines:
-        # Track frontmatter boundaries (between --- markers)
+# Lines that may be a --- front matter marker
+MARKER_LINE_RE = re.compile(r'^.*---.*$', re.MULTILINE)
+# Posts are read with universal newlines, so a lone \r also ends a line
+MARKER_LINE_BYTES_RE = re.compile(rb'(?<![^\r\n])[^\r\n]*---[^\r\n]*(?![^\r\n])')
+
+# The last quote on a line; an artifact if only whitespace follows it.
+# Every line the fixer changes ends in a quote, so this is the full signature.
+LAST_QUOTE_RE = re.compile(r'"([^\n"]*)$', re.MULTILINE)
+LAST_QUOTE_BYTES_RE = re.compile(rb'"([^\r\n"]*)(?:\r\n|\r|\n|\Z)')
+
+# Larger files are scanned through a memory map instead of being read in
+MMAP_THRESHOLD = 1 << 20
+
+
+def _body_offset(content, marker_re):
+    """Offset just past the second '---' line, where the fixer starts, or None."""
+    markers = 0
+    for match in marker_re.finditer(content):
+        line = match.group()
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
         if line.strip() == '---':
-            frontmatter_count += 1
-            fixed_lines.append(line)
-            if frontmatter_count == 1:
-                in_frontmatter = True
-            elif frontmatter_count == 2:
-                in_frontmatter = False
-            continue
+            markers += 1
+            if markers == 2:
+                return match.end()
+    return None
+
+
+def fix_line(line: str) -> str:
+    """Fix one content line after the front matter."""
+    stripped = line.strip()
+
+    # Empty quoted string becomes blank line
+    if stripped == '""':
+        return ''
+    # Single quote on its own line - remove it
+    if stripped == '"':
+        return ''
+    # Line wrapped in quotes - remove them
+    if stripped.startswith('"') and stripped.endswith('"') and len(stripped) > 1:
+        # Remove leading and trailing quotes
+        return stripped[1:-1]
+    # Line with trailing quote only - remove it
+    if stripped.endswith('"') and not stripped.startswith('"'):
+        # Remove trailing quote
+        return stripped[:-1]
+    # Keep other lines as-is
+    return line
 
-        # Keep frontmatter lines as-is
-        if in_frontmatter or frontmatter_count < 2:
-            fixed_lines.append(line)
-            continue
 
-        # Process content after frontmatter
-        stripped = line.strip()
-
-        # Empty quoted string becomes blank line
-        if stripped == '""':
-            fixed_lines.append('')
-        # Single quote on its own line - remove it
-        elif stripped == '"':
-            fixed_lines.append('')
-        # Line wrapped in quotes - remove them
-        elif stripped.startswith('"') and stripped.endswith('"') and len(stripped) > 1:
-            # Remove leading and trailing quotes
-            unquoted = stripped[1:-1]
-            fixed_lines.append(unquoted)
-        # Line with trailing quote only - remove it
-        elif stripped.endswith('"') and not stripped.startswith('"'):
-            # Remove trailing quote
-            fixed_lines.append(stripped[:-1])
-        # Keep other lines as-is
-        else:
-            fixed_lines.append(line)
-
-    return '\n'.join(fixed_lines)
-
-
-def process_blog_posts(blog_dir):
+def fix_content_formatting(content):
+    """Fix the formatting of blog post content.
+
+    Only lines ending in a quote can change, so those are found with one
+    regex scan and spliced in; the rest of the post is copied in slices
+    rather than split into lines.
+    """
+    # Keep frontmatter lines (up to the second --- marker) as-is
+    body_start = _body_offset(content, MARKER_LINE_RE)
+    if body_start is None:
+        return content
+
+    pieces = []
+    last = 0
+    for match in LAST_QUOTE_RE.finditer(content, body_start):
+        if match.group(1).strip():
+            continue
+        line_start = content.rfind('\n', 0, match.start()) + 1
+        line = content[line_start:match.end()]
+        pieces.append(content[last:line_start])
+        pieces.append(fix_line(line))
+        last = match.end()
+
+    if not pieces:
+        return content
+    pieces.append(content[last:])
+    return ''.join(pieces)
+
+
+def has_quote_artifacts(data) -> bool:
+    """Byte-level check for lines the fixer would change, after the front matter."""
+    body_start = _body_offset(data, MARKER_LINE_BYTES_RE)
+    if body_start is None:
+        return False
+    for match in LAST_QUOTE_BYTES_RE.finditer(data, body_start):
+        if not match.group(1).decode('utf-8', 'replace').strip():
+            return True
+    return False
+
+
+def scan_post(index_file: Path):
+    """(has artifacts, content digest) from the raw bytes of a post."""
+    with open(index_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        PROFILER.read(size)
+        if size < MMAP_THRESHOLD:
+            data = f.read()
+            return has_quote_artifacts(data), content_digest(data)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return has_quote_artifacts(data), content_digest(data)
+
+
+def fix_post(index_file: Path) -> PostResult:
+    """Fix the formatting of a single post."""
+    folder_name = index_file.parent.name
+
+    # Look for index.md file
+    if not index_file.exists():
+        return PostResult(folder_name, 'missing', [f"⚠️  No index.md in {folder_name}"])
+
+    # Read the file
+    try:
+        # Most posts are already clean; rule them out from the raw bytes
+        with PROFILER.stage('prefilter'):
+            suspect, digest = scan_post(index_file)
+        if not suspect:
+            return PostResult(folder_name, 'no_change', [f"⏭️  No changes: {folder_name}"], digest)
+
+        post = read_post(index_file)
+
+        # Fix the formatting
+        with PROFILER.stage('fix_formatting'):
+            fixed_content = fix_content_formatting(post.content)
+
+        # Only write if content changed - the main process does the write
+        if post.content != fixed_content:
+            return PostResult(folder_name, 'fixed', [f"✅ Fixed: {folder_name}"],
+                              content_digest(fixed_content.encode('utf-8')), fixed_content)
+
+        return PostResult(folder_name, 'no_change', [f"⏭️  No changes: {folder_name}"],
+                          content_digest(post.content.encode('utf-8')))
+
+    except Exception as e:
+        return PostResult(folder_name, 'error', [f"❌ Error processing {folder_name}: {e}"])
+
+
+def process_blog_posts(blog_dir, force=False, jobs=1):
     """Process all blog posts in date-titled folders."""
     blog_path = Path(blog_dir)
 
@@ -73,53 +164,71 @@ def process_blog_posts(blog_dir):
 
     processed = 0
     fixed = 0
+    unchanged = 0
+
+    manifest = RunManifest(manifest_path('fix_blog_formatting'), RULES_VERSION, reset=force)
+
+    # Manifest entries are recorded once the writes are committed
+    finished = []
+
+    with BatchWriter(journal_path('fix_blog_formatting'), resume=not force) as writer:
+        if writer.resumed:
+            print(f"Resuming interrupted run: {len(writer.resumed)} posts already done\n")
+
+        # Iterate through all date-titled folders (numbered ones like 1_, 2_ are skipped),
+        # leaving out posts untouched since the last run
+        pending = []
+        for folder in list_post_folders(blog_path):
+            index_file = folder / 'index.md'
+            if manifest.is_unchanged(index_file):
+                unchanged += 1
+            elif writer.is_done(index_file):
+                unchanged += 1
+                finished.append((index_file, writer.done_digest(index_file)))
+            else:
+                pending.append(index_file)
 
-    # Iterate through all subdirectories
-    for folder in sorted(blog_path.iterdir()):
-        if not folder.is_dir():
-            continue
-
-        folder_name = folder.name
-
-        # Skip numbered folders (1_, 2_, etc)
-        if not is_date_folder(folder_name):
-            continue
-
-        # Look for index.md file
-        index_file = folder / 'index.md'
-        if not index_file.exists():
-            print(f"⚠️  No index.md in {folder_name}")
-            continue
-
-        # Read the file
-        try:
-            with open(index_file, 'r', encoding='utf-8') as f:
-                original_content = f.read()
+        # Results come back in folder order, even with a process pool
+        for result in map_posts(fix_post, pending, jobs=jobs):
+            for message in result.messages:
+                print(message)
 
-            # Fix the formatting
-            fixed_content = fix_content_formatting(original_content)
+            if result.status in ('missing', 'error'):
+                continue
 
-            # Only write if content changed
-            if original_content != fixed_content:
-                with open(index_file, 'w', encoding='utf-8') as f:
-                    f.write(fixed_content)
-                print(f"✅ Fixed: {folder_name}")
-                fixed += 1
-            else:
-                print(f"⏭️  No changes: {folder_name}")
+            index_file = blog_path / result.folder_name / 'index.md'
+            if result.content is not None:
+                if writer.write(index_file, result.content.encode('utf-8')):
+                    fixed += 1
 
+            writer.mark_done(index_file, result.digest)
+            finished.append((index_file, result.digest))
             processed += 1
 
-        except Exception as e:
-            print(f"❌ Error processing {folder_name}: {e}")
+    for index_file, digest in finished:
+        manifest.record(index_file, digest=digest)
+    manifest.save()
 
     print(f"\n{'='*60}")
     print(f"Processed: {processed} blog posts")
     print(f"Fixed: {fixed} blog posts")
+    print(f"Unchanged since last run: {unchanged} blog posts")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
-    print(f"Fixing blog post formatting in: {blog_dir}\n")
-    process_blog_posts(blog_dir)
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--force', action='store_true',
+                        help='reprocess every post, ignoring the run manifest')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of worker processes')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"Fixing blog post formatting in: {args.blog_dir}\n")
+    with session(args, 'fix_blog_formatting'):
+        process_blog_posts(args.blog_dir, force=args.force, jobs=args.jobs)
@@ -5,99 +5,126 @@ Fix trailing quotes in blog post titles.
 
 import re
 from pathlib import Path
+from typing import Optional
 
+from atomic_writer import BatchWriter, journal_path
+from corpus import Header, list_post_folders, read_header, write_header
+from manifest import RunManifest, manifest_path
+from profiling import PROFILER, add_profile_arguments, session
 
-def is_date_folder(folder_name):
-    """Check if folder name matches date-title pattern."""
-    return bool(re.match(r'^\d{4}-\d{2}-\d{2}-', folder_name))
 
+# Bump when fix_title_quotes changes so every post is rechecked
+RULES_VERSION = '1'
 
-def fix_title_quotes(file_path: Path) -> bool:
-    """Remove trailing quotes from title and description."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    parts = content.split('---', 2)
-    if len(parts) < 3:
-        return False
-
-    front_matter = parts[1]
-    body = parts[2]
+TITLE_QUOTE_RE = re.compile(r'title:\s*"([^"]*)\\"\"')
+DESCRIPTION_QUOTE_RE = re.compile(r'description:\s*"([^"]*)\\"\"')
 
-    # Track if any changes were made
-    changed = False
 
+def fix_front_matter_quotes(front_matter: str) -> str:
+    """Remove trailing backslash-quote artifacts from title and description."""
     # Fix title - remove trailing backslash-quote pattern
     # Pattern matches: title: "text\""
-    title_pattern = r'title:\s*"([^"]*)\\"\"'
-    title_match = re.search(title_pattern, front_matter)
+    title_match = TITLE_QUOTE_RE.search(front_matter)
     if title_match:
         title_content = title_match.group(1)
         new_title_line = f'title: "{title_content}"'
-        front_matter = re.sub(
-            title_pattern,
-            new_title_line,
-            front_matter,
-            count=1
-        )
-        changed = True
+        front_matter = TITLE_QUOTE_RE.sub(new_title_line, front_matter, count=1)
 
     # Fix description - remove trailing backslash-quote pattern
     # Pattern matches: description: "text\""
-    desc_pattern = r'description:\s*"([^"]*)\\"\"'
-    desc_match = re.search(desc_pattern, front_matter)
+    desc_match = DESCRIPTION_QUOTE_RE.search(front_matter)
     if desc_match:
         desc_content = desc_match.group(1)
         new_desc_line = f'description: "{desc_content}"'
-        front_matter = re.sub(
-            desc_pattern,
-            new_desc_line,
-            front_matter,
-            count=1
-        )
-        changed = True
+        front_matter = DESCRIPTION_QUOTE_RE.sub(new_desc_line, front_matter, count=1)
+
+    return front_matter
+
+
+def fix_title_quotes(header: Header, writer: Optional[BatchWriter] = None) -> bool:
+    """Remove trailing quotes from title and description."""
+    front_matter = fix_front_matter_quotes(header.front_matter)
+
+    # Track if any changes were made
+    changed = front_matter != header.front_matter
 
     if changed:
-        # Reconstruct file
-        new_content = f"---{front_matter}---{body}"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        # Rewrite only the header bytes
+        write_header(header, front_matter, writer)
 
     return changed
 
 
-def fix_all_titles(blog_dir: str):
+def fix_all_titles(blog_dir: str, force: bool = False):
     """Fix titles in all blog posts."""
     blog_path = Path(blog_dir)
 
     fixed = 0
     skipped = 0
+    unchanged = 0
 
-    folders = [f for f in sorted(blog_path.iterdir())
-               if f.is_dir() and is_date_folder(f.name)]
+    manifest = RunManifest(manifest_path('fix_titles'), RULES_VERSION, reset=force)
 
-    print(f"Checking {len(folders)} blog posts for title issues...\n")
+    folders = list_post_folders(blog_path)
 
-    for folder in folders:
-        index_file = folder / 'index.md'
-        if not index_file.exists():
-            continue
+    print(f"Checking {len(folders)} blog posts for title issues...\n")
 
-        try:
-            if fix_title_quotes(index_file):
-                print(f"✅ Fixed: {folder.name}")
-                fixed += 1
-            else:
-                skipped += 1
-        except Exception as e:
-            print(f"❌ Error in {folder.name}: {e}")
+    # Manifest entries are recorded once the writes are committed
+    finished = []
+
+    with BatchWriter(journal_path('fix_titles'), resume=not force) as writer:
+        for folder in folders:
+            index_file = folder / 'index.md'
+
+            # Skip posts untouched since the last run
+            if manifest.is_unchanged(index_file):
+                unchanged += 1
+                continue
+
+            if not index_file.exists():
+                continue
+
+            # Already finished by an interrupted run
+            if writer.is_done(index_file):
+                unchanged += 1
+                finished.append(index_file)
+                continue
+
+            try:
+                with PROFILER.post(folder.name):
+                    header = read_header(index_file)
+                    changed = header and fix_title_quotes(header, writer)
+                if changed:
+                    print(f"✅ Fixed: {folder.name}")
+                    fixed += 1
+                else:
+                    skipped += 1
+                writer.mark_done(index_file)
+                finished.append(index_file)
+            except Exception as e:
+                print(f"❌ Error in {folder.name}: {e}")
+
+    for index_file in finished:
+        manifest.record(index_file, hash_content=False)
+    manifest.save()
 
     print(f"\n{'='*60}")
     print(f"Fixed: {fixed} posts")
     print(f"No changes needed: {skipped} posts")
+    print(f"Unchanged since last run: {unchanged} posts")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
-    fix_all_titles(blog_dir)
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--force', action='store_true',
+                        help='reprocess every post, ignoring the run manifest')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'fix_titles'):
+        fix_all_titles(args.blog_dir, force=args.force)
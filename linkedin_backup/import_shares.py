@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Import LinkedIn shares from Shares.csv into blog page bundles.
+Decodes the quoted commentary and only creates bundles for shares that are
+not in the import index yet, leaving out reposts and empty shares.
+"""
+
+import csv
+import json
+import math
+import os
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, read_post
+from manifest import CACHE_DIR
+from profiling import add_profile_arguments, session
+
+
+INDEX_FILE = CACHE_DIR / 'shares_index.json'
+
+# Near-duplicates found by near_duplicates.py
+SKIP_LIST_FILE = CACHE_DIR / 'duplicate_skip_list.json'
+
+SHARES_DATE_FORMAT = '%m/%d/%y %H:%M'
+
+# ShareLink ends with the share URN, e.g. ...urn%3Ali%3Ashare%3A7408929688083099648
+SHARE_ID_RE = re.compile(r'(\d+)\D*$')
+SLUG_WORD_RE = re.compile(r'[a-z0-9]+')
+
+TITLE_LENGTH = 70
+DESCRIPTION_LENGTH = 160
+SLUG_WORDS = 6
+
+# Hand-made bundles are dated on or next to the day of their share
+MATCH_WINDOW = timedelta(days=1)
+# Share of the commentary's words a bundle must contain to be its post
+MATCH_SIMILARITY = 0.45
+# Word overlap above which a share is the same text posted again
+REPOST_SIMILARITY = 0.8
+
+
+def share_id(share_link: str) -> str:
+    """Numeric share ID from a ShareLink URL."""
+    match = SHARE_ID_RE.search(share_link)
+    return match.group(1) if match else share_link
+
+
+def parse_share_date(value: str) -> datetime:
+    """Parse a Shares.csv date like '12/22/25 18:01'."""
+    return datetime.strptime(value.strip(), SHARES_DATE_FORMAT)
+
+
+def decode_commentary(text: str) -> str:
+    """Undo LinkedIn's per-line quoting of ShareCommentary.
+
+    After CSV decoding a multi-line commentary looks like:
+        first line "
+        "middle line"
+        ""
+        "last line
+    so the first line carries a trailing quote, the last a leading one,
+    the middle ones both, and blank lines are an empty quoted string.
+    """
+    lines = text.split('\n')
+    if len(lines) == 1:
+        return text.strip()
+
+    decoded = []
+    last = len(lines) - 1
+    for i, line in enumerate(lines):
+        if i > 0 and line.startswith('"'):
+            line = line[1:]
+        if i < last:
+            stripped = line.rstrip()
+            if stripped.endswith('"'):
+                line = stripped[:-1]
+        decoded.append(line.rstrip())
+
+    return '\n'.join(decoded).strip()
+
+
+def iter_shares(csv_file) -> Iterator[Dict]:
+    """Yield shares from Shares.csv one row at a time."""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {
+                'id': share_id(row['ShareLink']),
+                'link': row['ShareLink'],
+                'date': parse_share_date(row['Date']),
+                'commentary': decode_commentary(row['ShareCommentary']),
+                'shared_url': row.get('SharedUrl', '').strip(),
+                'media_url': row.get('MediaUrl', '').strip(),
+                'blog': row.get('Blog', '').strip().upper(),
+            }
+
+
+def _truncate(text: str, length: int) -> str:
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(' ', 1)[0]
+    return cut.rstrip(' ,.;:') + '...'
+
+
+def _yaml_string(text: str) -> str:
+    escaped = text.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def make_slug(text: str) -> str:
+    """Folder slug from the first words of a title."""
+    words = SLUG_WORD_RE.findall(text.lower())
+    return '-'.join(words[:SLUG_WORDS]) or 'post'
+
+
+def _text_lines(share: Dict):
+    return [line.strip() for line in share['commentary'].split('\n') if line.strip()]
+
+
+def share_title(share: Dict) -> str:
+    """Title from the first line of the commentary."""
+    lines = _text_lines(share)
+    return _truncate(lines[0], TITLE_LENGTH) if lines else 'LinkedIn post'
+
+
+def render_bundle(share: Dict) -> str:
+    """index.md content for a share."""
+    lines = _text_lines(share)
+    title = share_title(share)
+    description = _truncate(lines[1], DESCRIPTION_LENGTH) if len(lines) > 1 else ''
+
+    body = share['commentary']
+    if share['shared_url']:
+        body += f"\n\n[{share['shared_url']}]({share['shared_url']})"
+
+    return (
+        "---\n"
+        f"title: {_yaml_string(title)}\n"
+        f"date: {share['date']:%Y-%m-%dT%H:%M:00}\n"
+        "draft: false\n"
+        f"description: {_yaml_string(description)}\n"
+        "topics: []\n"
+        "---\n\n"
+        f"{body}\n\n"
+        "{{< subscription >}}\n"
+    )
+
+
+def load_index(index_file) -> Optional[Dict]:
+    """Load the import index, or None if it does not exist yet."""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_skip_list(skip_list_file) -> Dict[str, set]:
+    """Share IDs and post folders to skip as near-duplicates."""
+    with open(skip_list_file, 'r', encoding='utf-8') as f:
+        skip = json.load(f)
+    return {'shares': set(skip.get('shares', ())), 'posts': set(skip.get('posts', ()))}
+
+
+def save_index(index: Dict, index_file):
+    Path(index_file).parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(index, indent=2, sort_keys=True).encode('utf-8')
+    write_if_changed(index_file, data, fsync=False)
+
+
+def _words(text: str) -> set:
+    return set(SLUG_WORD_RE.findall(text.lower()))
+
+
+def bundle_texts(blog_dir) -> List[Tuple[date, str, set]]:
+    """Existing bundle folders with their post date and words."""
+    bundles = []
+    for folder in list_post_folders(blog_dir):
+        index_file = folder / 'index.md'
+        if not index_file.exists():
+            continue
+        post = read_post(index_file)
+        try:
+            post_date = date.fromisoformat(post.date[:10])
+        except ValueError:
+            continue
+        bundles.append((post_date, folder.name, _words(f"{post.title} {post.body or ''}")))
+    return bundles
+
+
+def match_bundles(shares: List[Dict], bundles: List[Tuple[date, str, set]]) -> Dict[str, str]:
+    """Share ID -> folder of the bundle made from it.
+
+    A bundle matches when it is dated within MATCH_WINDOW of the share and
+    holds most of the share's words. Best matches are taken first and each
+    bundle goes to at most one share.
+    """
+    candidates = []
+    for share in shares:
+        words = _words(share['commentary'])
+        if not words:
+            continue
+        for post_date, folder_name, bundle_words in bundles:
+            if abs(post_date - share['date'].date()) > MATCH_WINDOW:
+                continue
+            score = len(words & bundle_words) / len(words)
+            if score >= MATCH_SIMILARITY:
+                candidates.append((score, share['id'], folder_name))
+
+    matches = {}
+    taken = set()
+    for score, share_key, folder_name in sorted(candidates, reverse=True):
+        if share_key not in matches and folder_name not in taken:
+            matches[share_key] = folder_name
+            taken.add(folder_name)
+    return matches
+
+
+def _is_repost(first: Dict, second: Dict) -> bool:
+    words, other = first['words'], second['words']
+    shared = len(words & other)
+    if shared >= REPOST_SIMILARITY * len(words | other):
+        return True
+    # Posted again soon after with a few lines added or removed
+    return (abs(first['date'] - second['date']) <= MATCH_WINDOW
+            and shared >= REPOST_SIMILARITY * min(len(words), len(other)))
+
+
+def _original_rank(item: Dict):
+    """Sort key of the share to keep: one with a bundle, then one marked
+    for the blog, then the earliest."""
+    return (not item['imported'], item['blog'] != 'YES', item['date'])
+
+
+class RepostFinder:
+    """Shares seen so far, bucketed so a share is only compared with likely
+    reposts instead of the whole export history.
+
+    Two word sets with Jaccard >= REPOST_SIMILARITY always share one of the
+    first len - ceil(REPOST_SIMILARITY * len) + 1 words of each, taken rarest
+    first, so those prefixes are the buckets. Edited reposts only count
+    within MATCH_WINDOW, so they are found through per-day buckets.
+    """
+
+    def __init__(self):
+        self.items: Dict[str, Dict] = {}
+        self.days: Dict[date, List[str]] = {}
+        self.frequency: Counter = Counter()
+        self.prefixes: Optional[Dict[str, List[str]]] = None
+        self.groups: Dict[str, List[Dict]] = {}
+
+    def add(self, share: Dict, imported: bool):
+        words = _words(share['commentary'])
+        if not words:
+            return
+        self.items[share['id']] = {'id': share['id'], 'date': share['date'], 'blog': share['blog'],
+                                   'imported': imported, 'words': words}
+        self.frequency.update(words)
+        self.days.setdefault(share['date'].date(), []).append(share['id'])
+        self.prefixes = None
+        self.groups = {}
+
+    def _prefix(self, item: Dict) -> List[str]:
+        words = sorted(item['words'], key=lambda word: (self.frequency[word], word))
+        return words[:len(words) - math.ceil(REPOST_SIMILARITY * len(words)) + 1]
+
+    def _candidates(self, item: Dict) -> set:
+        if self.prefixes is None:
+            self.prefixes = {}
+            for other in self.items.values():
+                for word in self._prefix(other):
+                    self.prefixes.setdefault(word, []).append(other['id'])
+
+        keys = set()
+        for word in self._prefix(item):
+            keys.update(self.prefixes[word])
+        day = item['date'].date()
+        for offset in range(-MATCH_WINDOW.days, MATCH_WINDOW.days + 1):
+            keys.update(self.days.get(day + timedelta(days=offset), ()))
+        keys.discard(item['id'])
+        return keys
+
+    def _group(self, item: Dict) -> List[Dict]:
+        """Shares linked to item through a chain of reposts."""
+        if item['id'] not in self.groups:
+            members = {item['id']: item}
+            pending = [item]
+            while pending:
+                current = pending.pop()
+                for other in self._candidates(current):
+                    if other not in members and _is_repost(current, self.items[other]):
+                        members[other] = self.items[other]
+                        pending.append(self.items[other])
+            group = list(members.values())
+            for key in members:
+                self.groups[key] = group
+        return self.groups[item['id']]
+
+    def original_of(self, key: str) -> Optional[str]:
+        """ID of the share that key repeats, or None if it is the one to keep."""
+        item = self.items.get(key)
+        if item is None:
+            return None
+        best = min(self._group(item), key=_original_rank)
+        return None if best is item else best['id']
+
+
+def import_shares(csv_file: str, blog_dir: str, index_file=INDEX_FILE,
+                  dry_run: bool = False, skip_list_file=None):
+    """Create bundles for shares marked for the blog that are not imported yet."""
+    blog_path = Path(blog_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    imported = 0
+    already = 0
+    not_blog = 0
+    matched = 0
+    duplicates = 0
+    reposted = 0
+    empty = 0
+
+    skip_shares = load_skip_list(skip_list_file)['shares'] if skip_list_file else set()
+
+    index = load_index(index_file)
+    first_run = index is None
+    if first_run:
+        index = {}
+
+    # Shares already in the index are only kept as repost candidates
+    reposts = RepostFinder()
+    new_shares = []
+    for share in iter_shares(csv_file):
+        entry = index.get(share['id'])
+        if entry and (entry['folder'] or entry['blog'] == share['blog']):
+            reposts.add(share, imported=bool(entry['folder']))
+            already += 1
+        else:
+            new_shares.append(share)
+
+    matches = {}
+    if first_run:
+        # Link shares to bundles that were created by hand
+        matches = match_bundles(new_shares, bundle_texts(blog_path))
+    for share in new_shares:
+        reposts.add(share, imported=share['id'] in matches)
+
+    for share in new_shares:
+        if share['id'] in matches:
+            index[share['id']] = {'date': share['date'].isoformat(),
+                                  'blog': share['blog'], 'folder': matches[share['id']]}
+            matched += 1
+            continue
+
+        if share['blog'] != 'YES':
+            index[share['id']] = {'date': share['date'].isoformat(),
+                                  'blog': share['blog'], 'folder': None}
+            not_blog += 1
+            continue
+
+        # The same text posted again, or a bare reshare, has no post of its own
+        original = reposts.original_of(share['id'])
+        if original or not share['commentary'].strip():
+            index[share['id']] = {'date': share['date'].isoformat(),
+                                  'blog': share['blog'], 'folder': None,
+                                  'repost_of': original}
+            if original:
+                reposted += 1
+            else:
+                empty += 1
+            continue
+
+        # Left out of the index so it is imported if the skip list changes
+        if share['id'] in skip_shares:
+            print(f"⏭️  Near-duplicate, not imported: {share['id']}")
+            duplicates += 1
+            continue
+
+        base_name = f"{share['date']:%Y-%m-%d}-{make_slug(share_title(share))}"
+        folder_name = base_name
+        suffix = 2
+        while (blog_path / folder_name).exists():
+            folder_name = f'{base_name}-{suffix}'
+            suffix += 1
+
+        if dry_run:
+            print(f"🔍 Would import {share['id']} -> {folder_name}")
+            imported += 1
+            continue
+
+        folder = blog_path / folder_name
+        os.makedirs(folder, exist_ok=True)
+        write_if_changed(folder / 'index.md', render_bundle(share).encode('utf-8'))
+        index[share['id']] = {'date': share['date'].isoformat(),
+                              'blog': share['blog'], 'folder': folder_name}
+        print(f"✅ Imported: {folder_name}")
+        imported += 1
+
+    if not dry_run:
+        save_index(index, index_file)
+
+    print(f"\n{'='*60}")
+    print(f"Imported: {imported} shares")
+    print(f"Matched to existing bundles: {matched} shares")
+    print(f"Already imported: {already} shares")
+    print(f"Not marked for the blog: {not_blog} shares")
+    print(f"Reposts of another share: {reposted} shares")
+    print(f"Without commentary: {empty} shares")
+    print(f"Skipped as near-duplicates: {duplicates} shares")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('csv_file', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/linkedin_backup/Shares.csv')
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--index', default=str(INDEX_FILE),
+                        help='import index of share IDs already handled')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show what would be imported without writing')
+    parser.add_argument('--skip-list', nargs='?', const=str(SKIP_LIST_FILE),
+                        help='skip near-duplicate shares listed by near_duplicates.py '
+                             f'(default file: {SKIP_LIST_FILE})')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print("🔍 DRY RUN MODE - No files will be modified\n")
+
+    with session(args, 'import_shares'):
+        import_shares(args.csv_file, args.blog_dir, args.index, dry_run=args.dry_run,
+                      skip_list_file=args.skip_list)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-keyword matcher for tag suggestion.
+Compiles every tag keyword into a prefix-trie regex with word boundaries,
+so the text is scanned once no matter how large the keyword table grows.
+The few free-form patterns are matched with a regex each.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+# Bump when matching changes, so posts tagged by the old matcher are redone
+MATCHER_VERSION = '2'
+
+# Allow simple plurals so 'container' still matches 'containers'
+PLURAL_SUFFIX = r'(?:e?s)?'
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Build a regex that matches any of the words, preferring the longest."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_regex(trie)
+
+
+def _keyword_regex(keywords: List[str], name: str) -> str:
+    """Regex for keywords; 'kw' ones end on a word boundary, 'kx' ones are prefixes."""
+    if name == 'kw':
+        return f'(?P<{name}>{_trie_regex(keywords)}){PLURAL_SUFFIX}(?!\\w)'
+    return f'(?P<{name}>{_trie_regex(keywords)})'
+
+
+def _node_regex(node: dict) -> str:
+    branches = [re.escape(char) + _node_regex(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    # Ending here is tried last, so longer keywords win
+    optional = '' in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if optional else group
+
+
+class KeywordMatcher:
+    """Finds every tag hit in one pass over the text.
+
+    Keywords are tried at every word start, so a keyword inside a longer
+    one still counts ('code' in 'visual studio code'), as do shorter
+    keywords starting at the same place ('gpt' and 'gpt-4'). Each pattern
+    is its own regex, so patterns are never shadowed by keywords.
+    """
+
+    def __init__(self, tag_keywords: Dict[str, List[str]],
+                 patterns: Optional[Dict[str, str]] = None):
+        # A keyword may belong to several tags (e.g. 'optimization')
+        self._keyword_tags = defaultdict(list)
+        for tag, keywords in tag_keywords.items():
+            for keyword in keywords:
+                self._keyword_tags[keyword.lower()].append(tag)
+
+        # Keywords ending in a word char get a plural suffix and end boundary,
+        # ones like 'pd.' or 'np.' match as plain prefixes
+        bounded = [k for k in self._keyword_tags if _is_word_char(k[-1])]
+        prefixes = [k for k in self._keyword_tags if not _is_word_char(k[-1])]
+
+        alternatives = []
+        if bounded:
+            alternatives.append(_keyword_regex(bounded, 'kw'))
+        if prefixes:
+            alternatives.append(_keyword_regex(prefixes, 'kx'))
+
+        # The lookahead consumes nothing, so every word start is tried and
+        # overlapping hits are all found. Every keyword starts on a word
+        # boundary, which rejects most positions before the trie is tried.
+        self.regex = re.compile(r'(?<!\w)(?=(?P<hit>' + '|'.join(alternatives) + '))',
+                                re.IGNORECASE) if alternatives else None
+
+        # Only the longest keyword at a position is captured; these are the
+        # other keywords that can start at the same place
+        self._single = {k: re.compile(_keyword_regex([k], 'kw' if k in bounded else 'kx'),
+                                      re.IGNORECASE)
+                        for k in self._keyword_tags}
+        self._same_start = {
+            k: [other for other in self._keyword_tags
+                if other != k and (k.startswith(other) or other.startswith(k))]
+            for k in self._keyword_tags
+        }
+
+        self._patterns = [
+            (tag, re.compile(f'(?<!\\w)(?:{pattern}){PLURAL_SUFFIX}(?!\\w)', re.IGNORECASE))
+            for tag, pattern in (patterns or {}).items()
+        ]
+
+    def find_all(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Map each matched tag to the (start, end) spans of its hits."""
+        hits = defaultdict(list)
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                start = match.start()
+                keyword = (match.group('kw') or match.group('kx')).lower()
+                for tag in self._keyword_tags.get(keyword, []):
+                    hits[tag].append(match.span('hit'))
+                for other in self._same_start[keyword]:
+                    other_match = self._single[other].match(text, start)
+                    if other_match:
+                        for tag in self._keyword_tags[other]:
+                            hits[tag].append(other_match.span())
+
+        for tag, regex in self._patterns:
+            for match in regex.finditer(text):
+                hits[tag].append(match.span())
+        return dict(hits)
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Map each matched tag to its number of hits."""
+        return {tag: len(spans) for tag, spans in self.find_all(text).items()}
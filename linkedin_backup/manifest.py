@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Persistent run manifest so scripts only touch posts that changed.
+Stores per-post mtime, size and content hash plus the rules version that ran.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from profiling import PROFILER
+
+
+# Set to keep all cached state somewhere else, e.g. for benchmark runs
+CACHE_DIR_ENV = 'LINKEDIN_BACKUP_CACHE'
+CACHE_DIR = Path(os.environ.get(CACHE_DIR_ENV) or Path(__file__).resolve().parent / '.cache')
+
+
+def manifest_path(script_name: str) -> Path:
+    """Default manifest location for a script."""
+    return CACHE_DIR / f'{script_name}_manifest.json'
+
+
+def rules_fingerprint(*rules) -> str:
+    """Hash rule tables so editing them invalidates the manifest."""
+    encoded = json.dumps(rules, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class RunManifest:
+    """Per-post stat and hash records from the last successful run."""
+
+    def __init__(self, path, rules_version: str, reset: bool = False):
+        self.path = Path(path)
+        self.rules_version = str(rules_version)
+        self.entries = {}
+        self.rules_changed = False
+        self.dirty = False
+
+        if reset or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Corrupt or unreadable manifest - start over
+            return
+
+        if data.get('rules_version') == self.rules_version:
+            self.entries = data.get('posts', {})
+        else:
+            # Rules changed since the last run, every post is affected
+            self.rules_changed = True
+
+    def is_unchanged(self, index_file: Path) -> bool:
+        """Check if a post is identical to what the last run left behind."""
+        with PROFILER.stage('manifest'):
+            return self._is_unchanged(index_file)
+
+    def _is_unchanged(self, index_file: Path) -> bool:
+        key = os.path.abspath(index_file)
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        try:
+            st = os.stat(key)
+        except OSError:
+            return False
+
+        if st.st_mtime_ns == entry['mtime_ns'] and st.st_size == entry['size']:
+            return True
+        if st.st_size != entry['size'] or entry['sha256'] is None:
+            return False
+
+        # Touched but same size - fall back to the content hash
+        with open(key, 'rb') as f:
+            digest = content_digest(f.read())
+        if digest != entry['sha256']:
+            return False
+
+        entry['mtime_ns'] = st.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def digest(self, index_file: Path) -> Optional[str]:
+        """Recorded content hash of a file, if it is unchanged since then."""
+        if not self.is_unchanged(index_file):
+            return None
+        return self.entries[os.path.abspath(index_file)]['sha256']
+
+    def record(self, index_file: Path, data: Optional[bytes] = None,
+               digest: Optional[str] = None, hash_content: bool = True):
+        """Remember the current state of a post after it was processed.
+
+        With hash_content=False only the stat is kept, for callers that never
+        read the body; a touched file is then always reprocessed.
+        """
+        key = os.path.abspath(index_file)
+        if digest is None and hash_content:
+            if data is None:
+                with open(key, 'rb') as f:
+                    data = f.read()
+            digest = content_digest(data)
+        st = os.stat(key)
+        self.entries[key] = {
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha256': digest,
+        }
+        self.dirty = True
+
+    def forget(self, index_file: Path):
+        """Drop a post so the next run processes it again."""
+        if self.entries.pop(os.path.abspath(index_file), None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """Write the manifest if anything changed."""
+        if not self.dirty and not self.rules_changed:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rules_version': self.rules_version, 'posts': self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        self.rules_changed = False
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Link Rich_Media.csv uploads to their Shares.csv share and blog bundle.
+Both exports are sorted by timestamp and merge-joined within a tolerance
+window, and the result is saved as a mapping for the thumbnail and
+attachment steps, which use it to flag bundles whose upload was never
+downloaded.
+"""
+
+import csv
+import json
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from atomic_writer import write_if_changed
+from import_shares import INDEX_FILE, bundle_texts, iter_shares, load_index, match_bundles
+from manifest import CACHE_DIR
+from profiling import add_profile_arguments, session
+
+
+MEDIA_INDEX_FILE = CACHE_DIR / 'media_index.json'
+
+# "You uploaded a feed document on July 17, 2025 at 4:25 PM (GMT)"
+MEDIA_DATE_RE = re.compile(
+    r'You uploaded an? (?P<kind>.+?) on (?P<day>\w+ \d{1,2}, \d{4}) at (?P<time>\d{1,2}:\d{2} [AP]M)'
+)
+MEDIA_DATE_FORMAT = '%B %d, %Y %I:%M %p'
+
+# Uploads happen a few minutes before the share goes out
+JOIN_WINDOW = timedelta(minutes=30)
+
+# Upload kinds that end up as a bundle's attachment.pdf or thumbnail image
+DOCUMENT_KINDS = ('feed document',)
+IMAGE_KINDS = ('photo', 'feed photo', 'article cover photo')
+
+
+def parse_media_date(value: str):
+    """Parse a Rich_Media.csv timestamp into (kind, datetime), or None."""
+    match = MEDIA_DATE_RE.search(value)
+    if not match:
+        return None
+    date = datetime.strptime(f"{match['day']} {match['time']}", MEDIA_DATE_FORMAT)
+    return match['kind'], date
+
+
+def _media_description(text: str) -> str:
+    # LinkedIn writes ' -' for uploads without a description
+    text = text.strip()
+    return '' if text == '-' else text
+
+
+def iter_media(csv_file) -> Iterator[Dict]:
+    """Yield uploads from Rich_Media.csv one row at a time."""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            parsed = parse_media_date(row['Date/Time'])
+            if parsed is None:
+                print(f"⚠️  Unrecognized media date: {row['Date/Time']}")
+                continue
+            kind, date = parsed
+            yield {
+                'kind': kind,
+                'date': date,
+                'description': _media_description(row['Media Description']),
+                'link': row['Media Link'].strip(),
+            }
+
+
+def merge_join(media: List[Dict], shares: List[Dict],
+               window: timedelta = JOIN_WINDOW) -> List[Optional[Dict]]:
+    """Nearest share for each upload within window, both lists sorted by date.
+
+    Both sides are walked once, so the join is linear after the sorts.
+    """
+    matches = []
+    j = 0
+    for item in media:
+        # Move to the last share at or before the upload
+        while j + 1 < len(shares) and shares[j + 1]['date'] <= item['date']:
+            j += 1
+        candidates = shares[j:j + 2]
+        best = min(candidates, key=lambda share: abs(share['date'] - item['date']), default=None)
+        if best and abs(best['date'] - item['date']) <= window:
+            matches.append(best)
+        else:
+            matches.append(None)
+    return matches
+
+
+def build_media_index(media_csv, shares_csv, blog_dir, index_file=INDEX_FILE,
+                      window: timedelta = JOIN_WINDOW) -> Dict:
+    """Join uploads to shares and bundle folders."""
+    media = sorted(iter_media(media_csv), key=lambda item: item['date'])
+    shares = sorted(iter_shares(shares_csv), key=lambda share: share['date'])
+
+    # Folders from the share import, falling back to matching bundle contents
+    share_index = load_index(index_file) or {}
+    matches = None
+
+    entries = []
+    by_folder = {}
+    for item, share in zip(media, merge_join(media, shares, window)):
+        folder = None
+        if share:
+            entry = share_index.get(share['id'])
+            if entry:
+                folder = entry['folder']
+            else:
+                if matches is None:
+                    matches = match_bundles(shares, bundle_texts(blog_dir))
+                folder = matches.get(share['id'])
+
+        record = {
+            'date': item['date'].isoformat(),
+            'kind': item['kind'],
+            'description': item['description'],
+            'link': item['link'],
+            'share_id': share['id'] if share else None,
+            'share_date': share['date'].isoformat() if share else None,
+            'folder': folder,
+        }
+        entries.append(record)
+        if folder:
+            by_folder.setdefault(folder, []).append(record)
+
+    return {'media': entries, 'by_folder': by_folder}
+
+
+def load_media_index(media_index_file=MEDIA_INDEX_FILE) -> Optional[Dict]:
+    """Load the saved mapping, or None if it was not built yet."""
+    try:
+        with open(media_index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def folder_uploads(media_index: Optional[Dict], kinds) -> Dict[str, List[Dict]]:
+    """Uploads of the given kinds per bundle folder; empty without an index."""
+    if not media_index:
+        return {}
+    uploads = {}
+    for folder, records in media_index['by_folder'].items():
+        matching = [record for record in records if record['kind'] in kinds]
+        if matching:
+            uploads[folder] = matching
+    return uploads
+
+
+def save_media_index(media_index: Dict, media_index_file=MEDIA_INDEX_FILE):
+    Path(media_index_file).parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(media_index, indent=2, ensure_ascii=False).encode('utf-8')
+    write_if_changed(media_index_file, data, fsync=False)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('media_csv', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/linkedin_backup/Rich_Media.csv')
+    parser.add_argument('shares_csv', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/linkedin_backup/Shares.csv')
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--index', default=str(INDEX_FILE),
+                        help='share import index from import_shares.py')
+    parser.add_argument('--output', default=str(MEDIA_INDEX_FILE),
+                        help='where to save the media mapping')
+    parser.add_argument('--window', type=int, default=int(JOIN_WINDOW.total_seconds() // 60),
+                        help='join tolerance in minutes')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'media_index'):
+        media_index = build_media_index(args.media_csv, args.shares_csv, args.blog_dir,
+                                        args.index, timedelta(minutes=args.window))
+        save_media_index(media_index, args.output)
+
+    entries = media_index['media']
+    with_share = sum(1 for record in entries if record['share_id'])
+    with_folder = sum(1 for record in entries if record['folder'])
+
+    for record in entries:
+        if record['folder']:
+            print(f"✅ {record['date']} {record['kind']} -> {record['folder']}")
+        elif record['share_id']:
+            print(f"⏭️  {record['date']} {record['kind']} -> share {record['share_id']} (no bundle)")
+        else:
+            print(f"⚠️  {record['date']} {record['kind']}: no share within {args.window} minutes")
+
+    print(f"\n{'='*60}")
+    print(f"Media items: {len(entries)}")
+    print(f"Linked to a share: {with_share}")
+    print(f"Linked to a bundle: {with_folder}")
+    print(f"{'='*60}")
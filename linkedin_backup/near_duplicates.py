@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate texts among Shares.csv rows and blog bundles.
+Each share and post gets a MinHash signature of its word shingles, and
+locality-sensitive hashing buckets the signatures so only likely pairs are
+compared. Writes a cluster report and a skip list that import_shares.py and
+tag_blog_posts.py read with --skip-list.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from analyze_and_tag import clean_body, iter_post_info
+from atomic_writer import write_if_changed
+from import_shares import INDEX_FILE, SKIP_LIST_FILE, iter_shares, load_index
+from manifest import CACHE_DIR
+from profiling import PROFILER, add_profile_arguments, session
+
+
+REPORT_FILE = CACHE_DIR / 'near_duplicates.json'
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+SHINGLE_SIZE = 3
+
+# 16 bands of 8 rows put the LSH threshold near (1/16) ** (1/8) ~ 0.71
+NUM_PERM = 128
+BANDS = 16
+DEFAULT_THRESHOLD = 0.7
+
+# Hash functions h(x) = (a * x + b) mod p, kept within uint64
+MERSENNE_PRIME = (1 << 31) - 1
+SEED = 1
+
+PREVIEW_LENGTH = 80
+
+
+def shingles(text: str) -> np.ndarray:
+    """CRC32 hashes of the word shingles of a text."""
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(words))
+    grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """NUM_PERM seeded hash functions, applied to all shingles at once."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        # a < 2**31 and x < 2**32, so a * x + b fits in uint64
+        values = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return values.min(axis=0)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int = BANDS) -> set:
+    """Pairs of rows that share at least one band bucket."""
+    rows_per_band = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        block = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        for i, row in enumerate(block):
+            buckets.setdefault(row.tobytes(), []).append(i)
+        for members in buckets.values():
+            for j, first in enumerate(members):
+                for second in members[j + 1:]:
+                    pairs.add((first, second))
+    return pairs
+
+
+def cluster(count: int, pairs) -> List[List[int]]:
+    """Connected groups of items linked by pairs."""
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for first, second in pairs:
+        parent[find(first)] = find(second)
+
+    groups = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def load_items(shares_csv: str, blog_dir: str) -> List[Dict]:
+    """Shares and posts with the cleaned text that is compared."""
+    items = []
+    for share in iter_shares(shares_csv):
+        items.append({
+            'kind': 'share',
+            'id': share['id'],
+            'date': share['date'].isoformat(),
+            'blog': share['blog'],
+            'text': clean_body(share['commentary']),
+        })
+    for post_info in iter_post_info(blog_dir, ('folder', 'title', 'date', 'full_body')):
+        items.append({
+            'kind': 'post',
+            'id': post_info['folder'],
+            'date': post_info['date'],
+            'text': post_info['full_body'],
+        })
+    return items
+
+
+def _keeper(members: List[Dict]) -> Dict:
+    """The copy to keep: the earliest bundle, else the earliest share."""
+    posts = [item for item in members if item['kind'] == 'post']
+    return min(posts or members, key=lambda item: (item['date'], item['id']))
+
+
+def find_near_duplicates(shares_csv: str, blog_dir: str,
+                         threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """Cluster near-duplicate shares and posts; returns the report."""
+    hasher = MinHasher()
+    items = []
+    signatures = []
+    with PROFILER.stage('minhash'):
+        for item in load_items(shares_csv, blog_dir):
+            hashes = shingles(item['text'])
+            # Nothing to compare in posts without words
+            if len(hashes):
+                items.append(item)
+                signatures.append(hasher.signature(hashes))
+    signatures = np.array(signatures)
+
+    with PROFILER.stage('lsh'):
+        candidates = lsh_candidates(signatures) if items else set()
+
+    # Keep candidate pairs whose estimated Jaccard similarity is high enough
+    similar = {}
+    for first, second in candidates:
+        score = float(np.mean(signatures[first] == signatures[second]))
+        if score >= threshold:
+            similar[(first, second)] = score
+
+    clusters = []
+    skip_shares = set()
+    skip_posts = set()
+    for group in cluster(len(items), similar):
+        members = [items[i] for i in group]
+        keeper = _keeper(members)
+        in_group = set(group)
+        scores = [score for (first, second), score in similar.items() if first in in_group]
+        for item in members:
+            if item is keeper:
+                continue
+            (skip_posts if item['kind'] == 'post' else skip_shares).add(item['id'])
+
+        clusters.append({
+            'keep': f"{keeper['kind']}:{keeper['id']}",
+            'min_similarity': round(min(scores), 3),
+            'members': [{
+                'kind': item['kind'],
+                'id': item['id'],
+                'date': item['date'],
+                'preview': item['text'][:PREVIEW_LENGTH].replace('\n', ' '),
+            } for item in sorted(members, key=lambda item: (item['date'], item['id']))],
+        })
+
+    clusters.sort(key=lambda entry: entry['members'][0]['date'])
+    return {
+        'items': len(items),
+        'candidate_pairs': len(candidates),
+        'similar_pairs': len(similar),
+        'clusters': clusters,
+        'skip': {'shares': sorted(skip_shares), 'posts': sorted(skip_posts)},
+    }
+
+
+def _linked(entry: Dict, index: Optional[Dict]) -> bool:
+    """Whether a cluster is just a share and the bundle imported from it."""
+    kinds = [member['kind'] for member in entry['members']]
+    if sorted(kinds) != ['post', 'share'] or not index:
+        return False
+    share = next(member for member in entry['members'] if member['kind'] == 'share')
+    post = next(member for member in entry['members'] if member['kind'] == 'post')
+    return (index.get(share['id']) or {}).get('folder') == post['id']
+
+
+def save_json(data: Dict, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(path, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'),
+                     fsync=False)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('shares_csv', nargs='?', default=f'{site_dir}/linkedin_backup/Shares.csv')
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='minimum estimated Jaccard similarity of near-duplicates')
+    parser.add_argument('--index', default=str(INDEX_FILE),
+                        help='share import index, to tell imports from duplicates')
+    parser.add_argument('--report', default=str(REPORT_FILE),
+                        help='where to save the cluster report')
+    parser.add_argument('--skip-list', default=str(SKIP_LIST_FILE),
+                        help='where to save the skip list for import and tagging')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'near_duplicates'):
+        report = find_near_duplicates(args.shares_csv, args.blog_dir, args.threshold)
+        save_json(report, args.report)
+        save_json(report['skip'], args.skip_list)
+
+    index = load_index(args.index)
+    imported = 0
+    for entry in report['clusters']:
+        if _linked(entry, index):
+            imported += 1
+            continue
+        print(f"🔁 {len(entry['members'])} copies (similarity ≥ {entry['min_similarity']}), "
+              f"keeping {entry['keep']}")
+        for member in entry['members']:
+            print(f"   • {member['kind']:5s} {member['id']}  {member['date'][:10]}  {member['preview']}")
+
+    print(f"\n{'='*60}")
+    print(f"Shares and posts compared: {report['items']}")
+    print(f"LSH candidate pairs: {report['candidate_pairs']}, near-duplicates: {report['similar_pairs']}")
+    print(f"Clusters: {len(report['clusters'])} ({imported} are a share and its own bundle)")
+    print(f"Skip list: {len(report['skip']['shares'])} shares, {len(report['skip']['posts'])} posts")
+    print(f"Saved report to {args.report} and skip list to {args.skip_list}")
+    print(f"{'='*60}")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Render first-page previews of attachment.pdf carousels and shrink the PDFs.
+Each PDF gets a WebP preview of its first page and is replaced by a
+linearized, recompressed copy when that is smaller. The post's inline
+<object> viewer is replaced by the preview linked to the PDF, so the PDF
+only downloads when a reader opens it. Results are cached by content hash,
+so only new or edited PDFs are processed. Bundles that media_index.py linked
+to a LinkedIn document upload but that have no attachment.pdf are reported.
+"""
+
+import html
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pikepdf
+import pymupdf
+from PIL import Image
+
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, map_posts, parse_post
+from manifest import CACHE_DIR, RunManifest, content_digest, manifest_path
+from media_index import DOCUMENT_KINDS, MEDIA_INDEX_FILE, folder_uploads, load_media_index
+from profiling import add_profile_arguments, session
+
+
+PDF_CACHE = CACHE_DIR / 'pdf'
+
+ATTACHMENT_NAME = 'attachment.pdf'
+
+# The preview doubles as the list thumbnail unless the bundle has its own
+PREVIEW_THUMBNAIL = 'thumbnail.webp'
+PREVIEW_NAME = 'attachment-preview.webp'
+
+PREVIEW_WIDTH = 1200
+PREVIEW_QUALITY = 80
+
+# The inline viewer the import wrote; it downloads the whole PDF with the page
+EMBED_RE = re.compile(r'<object data="attachment\.pdf"[^>]*>.*?</object>', re.DOTALL)
+EMBED_TEMPLATE = (
+    '<a href="{pdf}"><img src="{preview}" alt="{alt}" width="{width}" height="{height}" '
+    'loading="lazy"></a>\n'
+    '<p><a href="{pdf}">Open the PDF</a> ({size})</p>'
+)
+
+
+def cache_files(digest: str) -> Tuple[Path, Path]:
+    """Cached (preview, optimized PDF) for a source PDF hash."""
+    folder = PDF_CACHE / digest[:2]
+    return folder / f'{digest}-w{PREVIEW_WIDTH}.webp', folder / f'{digest}.pdf'
+
+
+def render_preview(source: Path, target: Path):
+    """First page of a PDF as a WebP image PREVIEW_WIDTH pixels wide."""
+    with pymupdf.open(source) as document:
+        page = document[0]
+        zoom = PREVIEW_WIDTH / page.rect.width
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+    image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    image.save(target, format='WEBP', quality=PREVIEW_QUALITY)
+
+
+def optimize_pdf(source: Path, target: Path):
+    """Linearized copy with recompressed streams and packed objects."""
+    with pikepdf.open(source) as pdf:
+        pdf.remove_unreferenced_resources()
+        pdf.save(target, linearize=True, compress_streams=True, recompress_flate=True,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+
+def process_pdf(task: Tuple[str, str]) -> Optional[str]:
+    """Fill the cache for one PDF; returns an error or None."""
+    source, digest = task
+    preview, optimized = cache_files(digest)
+    preview.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_preview = preview.with_name(f'.{preview.name}.tmp')
+    tmp_optimized = optimized.with_name(f'.{optimized.name}.tmp')
+    try:
+        render_preview(Path(source), tmp_preview)
+        optimize_pdf(Path(source), tmp_optimized)
+
+        # Keep the original when rewriting does not make it smaller
+        if tmp_optimized.stat().st_size >= os.path.getsize(source):
+            shutil.copyfile(source, tmp_optimized)
+
+        os.replace(tmp_preview, preview)
+        os.replace(tmp_optimized, optimized)
+        return None
+    except Exception as e:
+        tmp_preview.unlink(missing_ok=True)
+        tmp_optimized.unlink(missing_ok=True)
+        return str(e)
+
+
+def _cache_alias(source: Path, alias: Path):
+    if not alias.exists():
+        alias.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, alias)
+        except OSError:
+            shutil.copyfile(source, alias)
+
+
+def preview_path(folder: Path) -> Path:
+    """Where a bundle's preview goes."""
+    if (folder / PREVIEW_THUMBNAIL).exists() or not any(folder.glob('thumbnail*')):
+        return folder / PREVIEW_THUMBNAIL
+    return folder / PREVIEW_NAME
+
+
+def preview_embed(preview: Path, pdf_size: int, title: str) -> str:
+    """Preview image linked to the PDF, in place of the inline viewer."""
+    with Image.open(preview) as image:
+        width, height = image.size
+    alt = f"First page of {title}" if title else "First page of the PDF"
+    return EMBED_TEMPLATE.format(
+        pdf=ATTACHMENT_NAME, preview=preview.name, alt=html.escape(alt),
+        width=width, height=height, size=f'{pdf_size / 1024 / 1024:.1f} MB',
+    )
+
+
+def replace_embed(folder: Path, preview: Path, pdf_size: int) -> bool:
+    """Swap the post's <object> PDF viewer for its preview; False if it has none."""
+    index_file = folder / 'index.md'
+    if not index_file.exists():
+        return False
+    with open(index_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if not EMBED_RE.search(content):
+        return False
+
+    embed = preview_embed(preview, pdf_size, parse_post(index_file, content).title)
+    content = EMBED_RE.sub(lambda match: embed, content)
+    return write_if_changed(index_file, content.encode('utf-8'))
+
+
+def build_pdf_previews(blog_dir: str, jobs: int = 1, media_index_file=MEDIA_INDEX_FILE):
+    """Preview and shrink every bundle's attachment.pdf."""
+    blog_path = Path(blog_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    media_index = load_media_index(media_index_file)
+    if media_index is None:
+        print(f"⚠️  No media index at {media_index_file}, run media_index.py to check for missing PDFs")
+    documents = folder_uploads(media_index, DOCUMENT_KINDS)
+
+    # Hashes are only recomputed for PDFs that changed since the last run
+    manifest = RunManifest(manifest_path('pdf_previews'), f'{PREVIEW_WIDTH}-{PREVIEW_QUALITY}')
+
+    attachments: Dict[Path, str] = {}
+    for folder in list_post_folders(blog_path):
+        source = folder / ATTACHMENT_NAME
+        if not source.exists():
+            continue
+        digest = manifest.digest(source)
+        if digest is None:
+            with open(source, 'rb') as f:
+                digest = content_digest(f.read())
+        attachments[source] = digest
+
+    tasks = [(str(source), digest) for source, digest in attachments.items()
+             if not all(path.exists() for path in cache_files(digest))]
+    missing = sorted(folder for folder in documents
+                     if blog_path / folder / ATTACHMENT_NAME not in attachments)
+    for folder in missing:
+        print(f"⚠️  Missing {ATTACHMENT_NAME}: {folder} ({len(documents[folder])} LinkedIn document uploads)")
+
+    print(f"Processing {len(tasks)} PDFs ({len(attachments) - len(tasks)} cached)\n")
+
+    failed = set()
+    for (source, _), error in zip(tasks, map_posts(process_pdf, tasks, jobs=jobs)):
+        if error:
+            print(f"❌ Error in {Path(source).parent.name}: {error}")
+            failed.add(source)
+
+    previews = 0
+    embeds = 0
+    shrunk = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    for source, digest in attachments.items():
+        if str(source) in failed:
+            continue
+
+        preview, optimized = cache_files(digest)
+        target = preview_path(source.parent)
+        with open(preview, 'rb') as f:
+            if write_if_changed(target, f.read()):
+                previews += 1
+
+        original_size = source.stat().st_size
+        with open(optimized, 'rb') as f:
+            data = f.read()
+        if write_if_changed(source, data):
+            shrunk += 1
+            print(f"✅ Shrunk: {source.parent.name}/{ATTACHMENT_NAME} "
+                  f"{original_size / 1024:.0f}K -> {len(data) / 1024:.0f}K")
+
+            # The optimized PDF is its own cache entry, so reruns are no-ops
+            new_preview, new_optimized = cache_files(content_digest(data))
+            _cache_alias(preview, new_preview)
+            _cache_alias(optimized, new_optimized)
+
+        if replace_embed(source.parent, target, len(data)):
+            embeds += 1
+            print(f"✅ Embed replaced: {source.parent.name}/index.md")
+
+        bytes_before += original_size
+        bytes_after += len(data)
+        manifest.record(source, data=data)
+
+    manifest.save()
+
+    print(f"\n{'='*60}")
+    print(f"PDFs: {len(attachments)}")
+    print(f"Document uploads without a PDF: {len(missing)}")
+    print(f"Previews written: {previews}")
+    print(f"Inline viewers replaced: {embeds}")
+    print(f"PDFs shrunk: {shrunk}")
+    print(f"Failed: {len(failed)}")
+    print(f"Size: {bytes_before / 1024 / 1024:.1f} MB -> {bytes_after / 1024 / 1024:.1f} MB")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    parser.add_argument('--media-index', default=str(MEDIA_INDEX_FILE),
+                        help='upload mapping from media_index.py')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'pdf_previews'):
+        build_pdf_previews(args.blog_dir, jobs=args.jobs, media_index_file=args.media_index)
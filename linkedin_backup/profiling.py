@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling shared by the linkedin_backup scripts.
+Records wall time per stage, bytes read and written and per-post latency,
+and can wrap a whole run in cProfile. Everything is a no-op unless a
+script is started with --profile.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict
+
+
+SLOWEST_POSTS = 10
+HOT_FUNCTIONS = 20
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class Profiler:
+    """Stage timers and I/O counters for one run."""
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.posts = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block under a stage name; nested stages count in both."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += time.perf_counter() - start
+            entry[1] += 1
+
+    @contextmanager
+    def post(self, name: str):
+        """Time the processing of one post."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.posts.append((name, time.perf_counter() - start))
+
+    def read(self, count: int):
+        if self.enabled:
+            self.bytes_read += count
+
+    def written(self, count: int):
+        if self.enabled:
+            self.bytes_written += count
+
+    def snapshot(self) -> Dict:
+        return {'stages': self.stages, 'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written, 'posts': self.posts}
+
+    def merge(self, snapshot: Dict):
+        """Add counters collected in a worker process."""
+        for name, (seconds, calls) in snapshot['stages'].items():
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+        self.bytes_read += snapshot['bytes_read']
+        self.bytes_written += snapshot['bytes_written']
+        self.posts.extend(snapshot['posts'])
+
+    def report(self, wall_time: float) -> Dict:
+        latencies = sorted(seconds for _, seconds in self.posts)
+        slowest = sorted(self.posts, key=lambda post: -post[1])[:SLOWEST_POSTS]
+        return {
+            'wall_time': wall_time,
+            'stages': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in
+                       sorted(self.stages.items(), key=lambda item: -item[1][0])},
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'posts': len(latencies),
+            'latency': {
+                'p50': _percentile(latencies, 0.50),
+                'p90': _percentile(latencies, 0.90),
+                'p99': _percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else 0.0,
+            },
+            'slowest_posts': [{'post': name, 'seconds': seconds} for name, seconds in slowest],
+        }
+
+
+# The one profiler of this process
+PROFILER = Profiler()
+
+
+def post_label(item) -> str:
+    """Readable name for a mapped item, e.g. the folder of an index.md."""
+    path = Path(item) if isinstance(item, (str, Path)) else None
+    if path is None:
+        return str(item)
+    return path.parent.name if path.name == 'index.md' else path.name
+
+
+def _timed_call(func: Callable, item):
+    """Worker side of profiled_map: run one item with fresh counters."""
+    PROFILER.reset()
+    PROFILER.enabled = True
+    with PROFILER.post(post_label(item)):
+        result = func(item)
+    return result, PROFILER.snapshot()
+
+
+def profiled_map(executor_map: Callable, func: Callable, items, **kwargs):
+    """executor.map that ships each worker's counters back to PROFILER."""
+    for result, snapshot in executor_map(partial(_timed_call, func), items, **kwargs):
+        PROFILER.merge(snapshot)
+        yield result
+
+
+def timed_map(func: Callable, items):
+    """Serial map recording each item's latency."""
+    for item in items:
+        with PROFILER.post(post_label(item)):
+            result = func(item)
+        yield result
+
+
+def print_report(report: Dict):
+    print(f"\n{'='*60}")
+    print("PROFILE")
+    print(f"{'='*60}")
+    print(f"Wall time: {report['wall_time']:.3f}s")
+    print(f"Bytes read: {report['bytes_read']:,}")
+    print(f"Bytes written: {report['bytes_written']:,}")
+
+    print("\nStages:")
+    for name, stage in report['stages'].items():
+        print(f"  • {name:20s} {stage['seconds']:8.3f}s  ({stage['calls']} calls)")
+
+    if report['posts']:
+        latency = report['latency']
+        print(f"\nPer-post latency over {report['posts']} posts:")
+        print(f"  p50 {latency['p50'] * 1000:.2f} ms, p90 {latency['p90'] * 1000:.2f} ms, "
+              f"p99 {latency['p99'] * 1000:.2f} ms, max {latency['max'] * 1000:.2f} ms")
+        print("\nSlowest posts:")
+        for post in report['slowest_posts']:
+            print(f"  • {post['post']:50s} {post['seconds'] * 1000:8.2f} ms")
+
+
+def add_profile_arguments(parser):
+    """Add --profile, --profile-output and --cprofile to a script's parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='record per-stage timings, I/O and per-post latency')
+    parser.add_argument('--profile-output',
+                        help='where to dump the profile as JSON (default: .cache/profile_<script>.json)')
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help='also run under cProfile (main process only) and save the stats')
+
+
+@contextmanager
+def session(args, script_name: str):
+    """Profile the enclosed run if args ask for it."""
+    if not getattr(args, 'profile', False) and not getattr(args, 'cprofile', None):
+        yield
+        return
+
+    # Only profiled runs pay for importing cProfile and pstats
+    import cProfile
+    import pstats
+
+    PROFILER.reset()
+    PROFILER.enabled = True
+    profile = cProfile.Profile() if args.cprofile else None
+
+    start = time.perf_counter()
+    if profile:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile:
+            profile.disable()
+        PROFILER.enabled = False
+        report = PROFILER.report(time.perf_counter() - start)
+        print_report(report)
+
+        output = args.profile_output
+        if output is None:
+            from manifest import CACHE_DIR
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            output = CACHE_DIR / f'profile_{script_name}.json'
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved profile to {output}")
+
+        if profile:
+            profile.dump_stats(args.cprofile)
+            print(f"Saved cProfile stats to {args.cprofile}\n")
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(HOT_FUNCTIONS)
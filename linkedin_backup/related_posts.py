@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Precompute related posts for Hugo as data/related.json.
+Scores posts by TF-IDF cosine similarity plus tag overlap and keeps the
+top matches per post. Only rows of posts that changed since the last run
+are recomputed; the rest are patched with the changed posts' scores.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from scipy import sparse
+
+from analyze_and_tag import iter_post_info
+from atomic_writer import write_if_changed
+from manifest import CACHE_DIR, content_digest, rules_fingerprint
+from profiling import add_profile_arguments, session
+from tfidf_tagger import TEXT_FIELDS, TITLE_WEIGHT, post_tokens, tfidf_matrix
+
+
+CACHE_FILE = CACHE_DIR / 'related_cache.json'
+
+DEFAULT_TOP_K = 5
+
+# Share of the score that comes from tag overlap instead of text
+TAG_WEIGHT = 0.3
+
+# Rows are scored in blocks so memory stays bounded on large archives
+BLOCK_SIZE = 512
+
+
+def tag_matrix(tag_lists: List[List[str]]) -> sparse.csr_matrix:
+    """Post x tag indicator matrix."""
+    columns = {}
+    rows = []
+    cols = []
+    for i, tags in enumerate(tag_lists):
+        for tag in set(tags):
+            rows.append(i)
+            cols.append(columns.setdefault(tag, len(columns)))
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                             shape=(len(tag_lists), len(columns)))
+
+
+def similarity(rows: np.ndarray, text: sparse.csr_matrix, tags: sparse.csr_matrix,
+               tag_weight: float = TAG_WEIGHT) -> np.ndarray:
+    """Scores of the given rows against every post, self matches zeroed."""
+    cosine = (text[rows] @ text.T).toarray()
+
+    # Jaccard overlap of the tag sets
+    shared = (tags[rows] @ tags.T).toarray()
+    sizes = np.asarray(tags.sum(axis=1)).ravel()
+    union = sizes[rows][:, None] + sizes[None, :] - shared
+    jaccard = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+    scores = (1 - tag_weight) * cosine + tag_weight * jaccard
+    scores[np.arange(len(rows)), rows] = 0.0
+    return scores
+
+
+def top_candidates(scores: np.ndarray, names: List[str], count: int) -> List[List]:
+    """Best [name, score] pairs of each score row, highest first."""
+    count = min(count, scores.shape[1])
+    best = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    candidates = []
+    for row, columns in zip(scores, best):
+        ranked = sorted(columns, key=lambda column: -row[column])
+        candidates.append([[names[column], round(float(row[column]), 4)]
+                           for column in ranked if row[column] > 0])
+    return candidates
+
+
+def load_cache(cache_file, rules_version: str) -> Dict:
+    """Cached candidate rows, empty if missing or built with other settings."""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('rules_version') != rules_version:
+        return {}
+    return cache.get('posts', {})
+
+
+def save_cache(posts: Dict, rules_version: str, cache_file):
+    Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps({'rules_version': rules_version, 'posts': posts}).encode('utf-8')
+    write_if_changed(cache_file, data, fsync=False)
+
+
+def build_related(blog_dir: str, output_file: str, top_k: int = DEFAULT_TOP_K,
+                  cache_file=CACHE_FILE, full: bool = False):
+    """Write the top related posts of every post to output_file."""
+    start = time.perf_counter()
+
+    posts = list(iter_post_info(blog_dir, TEXT_FIELDS + ('tags',)))
+    names = [post['folder'] for post in posts]
+    position = {name: i for i, name in enumerate(names)}
+    tokens = [post_tokens(post) for post in posts]
+    tag_lists = [post['tags'] for post in posts]
+    digests = [content_digest(json.dumps([words, tags]).encode('utf-8'))
+               for words, tags in zip(tokens, tag_lists)]
+
+    text, _, _ = tfidf_matrix(tokens)
+    tags = tag_matrix(tag_lists)
+
+    # Extra candidates let a row drop changed posts without a full recompute
+    keep = 2 * top_k
+    rules_version = rules_fingerprint(keep, TAG_WEIGHT, TITLE_WEIGHT)
+    cache = {} if full else load_cache(cache_file, rules_version)
+
+    changed = [i for i, name in enumerate(names)
+               if cache.get(name, {}).get('digest') != digests[i]]
+    changed_names = {names[i] for i in changed}
+    removed = set(cache) - set(names)
+
+    # Unchanged rows keep their scores for unchanged posts only. Those scores
+    # carry the IDF weights of the run that computed them; --full refreshes them.
+    candidates = {}
+    recompute = list(changed)
+    for i, name in enumerate(names):
+        if name in changed_names:
+            continue
+        kept = [pair for pair in cache[name]['candidates']
+                if pair[0] not in changed_names and pair[0] not in removed]
+        if len(kept) < min(top_k, len(names) - 1 - len(changed)):
+            recompute.append(i)
+        else:
+            candidates[name] = kept
+
+    # Score recomputed rows against everything; the changed rows' scores
+    # double as the changed columns of every other row
+    recompute = np.asarray(sorted(recompute), dtype=np.int64)
+    recomputed_names = {names[i] for i in recompute}
+    changed_columns = np.asarray(changed, dtype=np.int64)
+    changed_scores = []
+    for block_start in range(0, len(recompute), BLOCK_SIZE):
+        rows = recompute[block_start:block_start + BLOCK_SIZE]
+        scores = similarity(rows, text, tags)
+        for name_index, row_candidates in zip(rows, top_candidates(scores, names, keep)):
+            candidates[names[name_index]] = row_candidates
+        is_changed = np.isin(rows, changed_columns)
+        if is_changed.any():
+            changed_scores.append((rows[is_changed], scores[is_changed]))
+
+    for rows, scores in changed_scores:
+        for row, row_scores in zip(rows, scores):
+            changed_name = names[row]
+            for name, kept in candidates.items():
+                if name in recomputed_names or not row_scores[position[name]] > 0:
+                    continue
+                kept.append([changed_name, round(float(row_scores[position[name]]), 4)])
+
+    for name, kept in candidates.items():
+        if name not in recomputed_names:
+            kept.sort(key=lambda pair: -pair[1])
+            del kept[keep:]
+
+    related = {name: [pair[0] for pair in candidates[name][:top_k]] for name in names}
+    written = write_if_changed(output_file, json.dumps(related, indent=1).encode('utf-8'), fsync=False)
+
+    save_cache({name: {'digest': digests[i], 'candidates': candidates[name]}
+                for i, name in enumerate(names)}, rules_version, cache_file)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{'='*60}")
+    print(f"Posts: {len(names)}")
+    print(f"Changed since last run: {len(changed)} posts, removed: {len(removed)}")
+    print(f"Recomputed rows: {len(recompute)}")
+    print(f"{'Updated' if written else 'Unchanged'}: {output_file} ({elapsed:.3f}s)")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--output',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/data/related.json',
+                        help='Hugo data file to write')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help='related posts kept per post')
+    parser.add_argument('--full', action='store_true',
+                        help='recompute every row, ignoring the cache')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with session(args, 'related_posts'):
+        build_related(args.blog_dir, args.output, args.top_k, full=args.full)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Run the formatting, title, tagging and curated-tag fixes as one pipeline.
+Each post is read once, transformed in memory and written at most once.
+"""
+
+import json
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fix_blog_formatting
+import fix_titles
+import tag_blog_posts
+from apply_curated_tags import topics_front_matter
+from atomic_writer import BatchWriter, journal_path
+from corpus import Post, PostResult, list_post_folders, map_posts, parse_post, read_post
+from manifest import RunManifest, content_digest, manifest_path, rules_fingerprint
+from profiling import PROFILER, add_profile_arguments, session
+
+
+def _with_front_matter(post: Post, front_matter: str) -> str:
+    """Content with a new front matter, or unchanged content if it is the same."""
+    if front_matter == post.front_matter:
+        return post.content
+    return f"---{front_matter}---{post.body}"
+
+
+def formatting_step(post: Post) -> str:
+    """Quote cleanup from fix_blog_formatting."""
+    return fix_blog_formatting.fix_content_formatting(post.content)
+
+
+def titles_step(post: Post) -> str:
+    """Title/description unescaping from fix_titles."""
+    if not post.has_front_matter:
+        return post.content
+    return _with_front_matter(post, fix_titles.fix_front_matter_quotes(post.front_matter))
+
+
+def tags_step(post: Post) -> str:
+    """Keyword tag suggestion from tag_blog_posts."""
+    if not post.has_front_matter:
+        return post.content
+
+    current_tags, final_tags = tag_blog_posts.merged_tags(post)
+    if not final_tags or set(current_tags) == set(final_tags):
+        return post.content
+    return _with_front_matter(post, tag_blog_posts.tags_front_matter(post.front_matter, final_tags))
+
+
+def curated_step(post: Post, tag_mapping: Dict[str, List[str]]) -> str:
+    """Curated topics from blog_tags_mapping.json."""
+    tags = tag_mapping.get(post.name)
+    if tags is None or not post.has_front_matter:
+        return post.content
+    return _with_front_matter(post, topics_front_matter(post.front_matter, tags))
+
+
+# Steps in the order they run
+STEPS = {
+    'formatting': formatting_step,
+    'titles': titles_step,
+    'tags': tags_step,
+    'curated': curated_step,
+}
+
+DEFAULT_STEPS = ['formatting', 'titles', 'tags']
+
+
+def transform_post(index_file: Path, steps: List[str],
+                   tag_mapping: Optional[Dict[str, List[str]]] = None,
+                   dry_run: bool = False) -> PostResult:
+    """Run every step over one post in memory, returning the content to write if it changed."""
+    folder_name = index_file.parent.name
+
+    if not index_file.exists():
+        return PostResult(folder_name, 'missing', [f"⚠️  No index.md in {folder_name}"])
+
+    try:
+        post = read_post(index_file)
+        original = post.content
+        changed_by = []
+
+        for name in steps:
+            step = STEPS[name]
+            with PROFILER.stage(name):
+                content = step(post, tag_mapping or {}) if name == 'curated' else step(post)
+            if content != post.content:
+                changed_by.append(name)
+                post = parse_post(index_file, content)
+
+        if post.content == original:
+            return PostResult(folder_name, 'skipped', [f"⏭️  No changes: {folder_name}"],
+                              content_digest(original.encode('utf-8')))
+
+        if dry_run:
+            return PostResult(folder_name, 'would_update',
+                              [f"🔍 Would update {folder_name} ({', '.join(changed_by)})"])
+
+        # The main process does the single write
+        return PostResult(folder_name, 'updated',
+                          [f"✅ Updated: {folder_name} ({', '.join(changed_by)})"],
+                          content_digest(post.content.encode('utf-8')), post.content)
+
+    except Exception as e:
+        return PostResult(folder_name, 'error', [f"❌ Error processing {folder_name}: {e}"])
+
+
+def select_steps(steps: Optional[List[str]] = None, mapping_file: Optional[str] = None):
+    """Steps to run in their documented order, and the curated mapping if given."""
+    steps = list(steps or DEFAULT_STEPS)
+    tag_mapping = None
+    if mapping_file:
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            tag_mapping = json.load(f)
+        if 'curated' not in steps:
+            steps.append('curated')
+
+    # Keep the documented step order whatever order they were given in
+    return [name for name in STEPS if name in steps], tag_mapping
+
+
+def pipeline_rules_version(steps: List[str],
+                           tag_mapping: Optional[Dict[str, List[str]]] = None) -> str:
+    """Manifest version for a set of steps; any change to the steps, their
+    rules or the mapping reprocesses every post."""
+    return rules_fingerprint(
+        steps,
+        fix_blog_formatting.RULES_VERSION,
+        fix_titles.RULES_VERSION,
+        tag_blog_posts.RULES_VERSION,
+        tag_mapping,
+    )
+
+
+def run_pipeline(blog_dir: str, steps: Optional[List[str]] = None,
+                 mapping_file: Optional[str] = None, dry_run: bool = False,
+                 force: bool = False, jobs: int = 1):
+    """Run the selected steps over all blog posts."""
+    blog_path = Path(blog_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    steps, tag_mapping = select_steps(steps, mapping_file)
+
+    processed = 0
+    updated = 0
+    skipped = 0
+    unchanged = 0
+
+    manifest = RunManifest(manifest_path('run_pipeline'), pipeline_rules_version(steps, tag_mapping),
+                           reset=force)
+
+    folders = list_post_folders(blog_path)
+
+    print(f"Running {' -> '.join(steps)} over {len(folders)} blog posts\n")
+
+    # Manifest entries are recorded once the writes are committed
+    finished = []
+
+    # A dry run neither writes nor journals
+    journal = None if dry_run else journal_path('run_pipeline')
+
+    with BatchWriter(journal, resume=not force) as writer:
+        if writer.resumed:
+            print(f"Resuming interrupted run: {len(writer.resumed)} posts already done\n")
+
+        # Skip posts untouched since the last run
+        pending = []
+        for folder in folders:
+            index_file = folder / 'index.md'
+            if manifest.is_unchanged(index_file):
+                unchanged += 1
+            elif writer.is_done(index_file):
+                unchanged += 1
+                finished.append((index_file, writer.done_digest(index_file)))
+            else:
+                pending.append(index_file)
+
+        # Results come back in folder order, even with a process pool
+        worker = partial(transform_post, steps=steps, tag_mapping=tag_mapping, dry_run=dry_run)
+        for result in map_posts(worker, pending, jobs=jobs):
+            for message in result.messages:
+                print(message)
+
+            if result.status in ('missing', 'error'):
+                continue
+
+            index_file = blog_path / result.folder_name / 'index.md'
+            if result.status == 'skipped':
+                skipped += 1
+            elif result.status == 'updated':
+                if writer.write(index_file, result.content.encode('utf-8')):
+                    updated += 1
+
+            if result.digest:
+                writer.mark_done(index_file, result.digest)
+                finished.append((index_file, result.digest))
+            processed += 1
+
+    # A dry run must not mark posts as handled
+    if not dry_run:
+        for index_file, digest in finished:
+            manifest.record(index_file, digest=digest)
+        manifest.save()
+
+    print(f"\n{'='*60}")
+    print(f"Processed: {processed} blog posts")
+    print(f"Updated: {updated} blog posts")
+    print(f"Skipped (no changes): {skipped} blog posts")
+    print(f"Unchanged since last run: {unchanged} blog posts")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--steps', default=','.join(DEFAULT_STEPS),
+                        help=f'comma-separated steps to run, from {",".join(STEPS)}')
+    parser.add_argument('--mapping',
+                        help='blog_tags_mapping.json to apply curated topics from')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show changes without modifying files')
+    parser.add_argument('--force', action='store_true',
+                        help='reprocess every post, ignoring the run manifest')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of worker processes')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    steps = [name.strip() for name in args.steps.split(',') if name.strip()]
+    unknown = [name for name in steps if name not in STEPS]
+    if unknown:
+        parser.error(f"Unknown steps: {', '.join(unknown)}")
+    if 'curated' in steps and not args.mapping:
+        parser.error("The curated step needs --mapping")
+
+    if args.dry_run:
+        print("🔍 DRY RUN MODE - No files will be modified\n")
+
+    with session(args, 'run_pipeline'):
+        run_pipeline(args.blog_dir, steps, args.mapping, dry_run=args.dry_run,
+                     force=args.force, jobs=args.jobs)
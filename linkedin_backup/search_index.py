@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Build a prebuilt client-side search index for the blog under static/search.
+Post text is tokenized and stemmed in one pass into an inverted index that
+is sharded by term prefix, with delta-encoded postings, so the browser only
+downloads the shards for the terms it searches. Only the shards holding
+terms of posts that changed since the last run are rewritten.
+"""
+
+import json
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, Set
+
+from analyze_and_tag import extract_post_info
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, read_post
+from manifest import CACHE_DIR, RunManifest, content_digest, manifest_path, rules_fingerprint
+from profiling import PROFILER, add_profile_arguments, session
+from tfidf_tagger import STOP_WORDS, TITLE_WEIGHT
+
+
+CACHE_FILE = CACHE_DIR / 'search_cache.json'
+
+FIELDS = ('folder', 'title', 'description', 'date', 'full_body')
+
+# ASCII only, so the browser can use the same pattern
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+MIN_TOKEN_LENGTH = 2
+
+# Light suffix stripping: one plural rule, then one verb/adverb rule, each
+# the first match that leaves at least MIN_STEM characters. A replacement
+# equal to its suffix protects words like "class" or "analysis".
+STEM_RULES = (
+    (('sses', 'ss'), ('ies', 'y'), ('xes', 'x'), ('ches', 'ch'), ('shes', 'sh'),
+     ('ss', 'ss'), ('us', 'us'), ('is', 'is'), ('s', '')),
+    (('ingly', ''), ('ing', ''), ('edly', ''), ('ed', ''), ('ly', '')),
+)
+MIN_STEM = 3
+
+# Terms sharing their first characters share a shard file
+SHARD_PREFIX = 2
+SHARD_NAME_RE = re.compile(r'[^a-z0-9]')
+
+URL_PREFIX = '/blog'
+
+
+@lru_cache(maxsize=None)
+def stem(token: str) -> str:
+    for rules in STEM_RULES:
+        for suffix, replacement in rules:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+                token = token[:len(token) - len(suffix)] + replacement
+                break
+    return token
+
+
+def stems(text: str) -> Iterator[str]:
+    """Stemmed search terms of a text, in one pass over it."""
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS:
+            yield stem(token)
+
+
+def post_terms(post_info: Dict) -> Dict[str, int]:
+    """Term frequencies of a post, with title and description words weighted up."""
+    counts = Counter()
+    for term in stems(f"{post_info['title']} {post_info['description']}"):
+        counts[term] += TITLE_WEIGHT
+    counts.update(stems(post_info['full_body']))
+    return dict(counts)
+
+
+def shard_key(term: str) -> str:
+    """Shard file name for a term."""
+    return SHARD_NAME_RE.sub('_', term[:SHARD_PREFIX])
+
+
+def encode_postings(postings: Dict[str, int]) -> list:
+    """[gap, tf, gap, tf, ...] over the postings sorted by document id."""
+    encoded = []
+    previous = 0
+    for doc_id, tf in sorted((int(doc_id), tf) for doc_id, tf in postings.items()):
+        encoded.append(doc_id - previous)
+        encoded.append(tf)
+        previous = doc_id
+    return encoded
+
+
+def rules_version() -> str:
+    return rules_fingerprint(TOKEN_RE.pattern, MIN_TOKEN_LENGTH, sorted(STOP_WORDS), STEM_RULES,
+                             MIN_STEM, SHARD_PREFIX, TITLE_WEIGHT, URL_PREFIX)
+
+
+def empty_cache(version: str) -> Dict:
+    return {'rules_version': version, 'next_id': 0, 'docs': {}, 'shards': {}, 'hashes': {}}
+
+
+def load_cache(cache_file, version: str) -> Dict:
+    """Cached documents and postings, empty if missing or built with other rules."""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty_cache(version)
+    if cache.get('rules_version') != version:
+        return empty_cache(version)
+    return cache
+
+
+def save_cache(cache: Dict, cache_file):
+    Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(cache_file, json.dumps(cache).encode('utf-8'), fsync=False)
+
+
+def _remove_terms(cache: Dict, doc_id: int, terms: Dict[str, int], dirty: Set[str]):
+    for term in terms:
+        key = shard_key(term)
+        shard = cache['shards'][key]
+        del shard[term][str(doc_id)]
+        if not shard[term]:
+            del shard[term]
+        dirty.add(key)
+
+
+def _add_terms(cache: Dict, doc_id: int, terms: Dict[str, int], dirty: Set[str]):
+    for term, tf in terms.items():
+        key = shard_key(term)
+        cache['shards'].setdefault(key, {}).setdefault(term, {})[str(doc_id)] = tf
+        dirty.add(key)
+
+
+def build_search_index(blog_dir: str, output_dir: str, cache_file=CACHE_FILE, full: bool = False):
+    """Update the sharded search index in output_dir."""
+    start = time.perf_counter()
+    blog_path = Path(blog_dir)
+    output_path = Path(output_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    version = rules_version()
+    cache = empty_cache(version) if full else load_cache(cache_file, version)
+    docs = cache['docs']
+
+    # Built from scratch: every post is read and every shard rewritten
+    fresh = not docs
+    manifest = RunManifest(manifest_path('search_index'), version, reset=fresh)
+
+    folders = list_post_folders(blog_path)
+    names = {folder.name for folder in folders}
+    dirty: Set[str] = set()
+    docs_changed = False
+
+    changed = 0
+    unindexed = []
+    for folder in folders:
+        index_file = folder / 'index.md'
+        if not index_file.exists():
+            unindexed.append(folder.name)
+            continue
+        if folder.name in docs and manifest.is_unchanged(index_file):
+            continue
+
+        post = read_post(index_file)
+        post_info = extract_post_info(post, FIELDS)
+        if post_info is None:
+            unindexed.append(folder.name)
+            continue
+        with PROFILER.stage('tokenize'):
+            terms = post_terms(post_info)
+        manifest.record(index_file, data=post.content.encode('utf-8'))
+
+        doc = docs.get(folder.name)
+        if doc is None:
+            doc = docs[folder.name] = {'id': cache['next_id'], 'terms': {}}
+            cache['next_id'] += 1
+
+        # Only terms whose frequency moved touch their shard
+        old_terms = doc['terms']
+        _remove_terms(cache, doc['id'], {term: tf for term, tf in old_terms.items()
+                                         if terms.get(term) != tf}, dirty)
+        _add_terms(cache, doc['id'], {term: tf for term, tf in terms.items()
+                                      if old_terms.get(term) != tf}, dirty)
+
+        entry = [post_info['title'], post_info['date']]
+        if doc.get('entry') != entry:
+            docs_changed = True
+        doc.update(terms=terms, entry=entry)
+        changed += 1
+
+    # Posts that were deleted, renamed or lost their front matter
+    removed = [name for name in docs if name not in names or name in unindexed]
+    for name in removed:
+        doc = docs.pop(name)
+        _remove_terms(cache, doc['id'], doc['terms'], dirty)
+        docs_changed = True
+
+    if fresh:
+        dirty = set(cache['shards'])
+        docs_changed = True
+        # Shards left over from an older build
+        if output_path.exists():
+            for path in output_path.glob('*.json'):
+                if path.stem not in dirty and path.name not in ('meta.json', 'docs.json'):
+                    path.unlink()
+
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for key in sorted(dirty):
+        shard = cache['shards'].get(key)
+        path = output_path / f'{key}.json'
+        if not shard:
+            cache['shards'].pop(key, None)
+            cache['hashes'].pop(key, None)
+            path.unlink(missing_ok=True)
+            continue
+        data = json.dumps({term: encode_postings(shard[term]) for term in sorted(shard)},
+                          separators=(',', ':')).encode('utf-8')
+        cache['hashes'][key] = content_digest(data)[:8]
+        if write_if_changed(path, data, fsync=False):
+            written += 1
+
+    # Document table by id; ids of removed posts stay empty until --full
+    if docs_changed:
+        table = [None] * cache['next_id']
+        for name, doc in docs.items():
+            table[doc['id']] = [f'{URL_PREFIX}/{name}/'] + doc['entry']
+        data = json.dumps(table, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        cache['docs_hash'] = content_digest(data)[:8]
+        write_if_changed(output_path / 'docs.json', data, fsync=False)
+
+    meta = {
+        'version': version[:8],
+        'documents': len(docs),
+        'docs': cache['docs_hash'],
+        'token_pattern': TOKEN_RE.pattern,
+        'min_token_length': MIN_TOKEN_LENGTH,
+        'stop_words': sorted(STOP_WORDS),
+        'stem_rules': STEM_RULES,
+        'min_stem': MIN_STEM,
+        'shard_prefix': SHARD_PREFIX,
+        'shards': dict(sorted(cache['hashes'].items())),
+    }
+    write_if_changed(output_path / 'meta.json',
+                     json.dumps(meta, separators=(',', ':')).encode('utf-8'), fsync=False)
+
+    save_cache(cache, cache_file)
+    manifest.save()
+
+    elapsed = time.perf_counter() - start
+    terms = sum(len(shard) for shard in cache['shards'].values())
+    print(f"\n{'='*60}")
+    print(f"Posts: {len(docs)}, terms: {terms}, shards: {len(cache['shards'])}")
+    print(f"Changed since last run: {changed} posts, removed: {len(removed)}")
+    print(f"Shards rewritten: {written} of {len(dirty)} touched ({elapsed:.3f}s)")
+    print(f"Saved search index to {output_dir}")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--output', default=f'{site_dir}/static/search',
+                        help='where the index is published (/search on the site)')
+    parser.add_argument('--full', action='store_true',
+                        help='rebuild every shard and renumber posts, ignoring the cache')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'search_index'):
+        build_search_index(args.blog_dir, args.output, full=args.full)
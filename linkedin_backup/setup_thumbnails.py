@@ -1,17 +1,56 @@
 #!/usr/bin/env python3
 """
 Rename attachment images to thumbnails for Congo theme preview support.
+Also builds WebP/AVIF variants of every thumbnail at the size Congo's post
+lists show them, cached by source hash and target size so reruns only
+encode new images. layouts/partials/article-link.html serves them from the
+data file. Bundles that media_index.py linked to a LinkedIn image upload
+but that have no thumbnail are reported.
 """
 
+import json
 import os
 import shutil
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from PIL import Image, ImageOps, features
 
-def setup_thumbnails(blog_dir):
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, map_posts
+from manifest import CACHE_DIR, RunManifest, content_digest, manifest_path
+from media_index import IMAGE_KINDS, MEDIA_INDEX_FILE, folder_uploads, load_media_index
+from profiling import add_profile_arguments, session
+
+
+# Encoded variants, named by source hash, width and quality
+VARIANT_CACHE = CACHE_DIR / 'thumbnails'
+
+# Congo crops list thumbnails to 4:3 and shows them 160px wide (320px at 2x)
+WIDTHS = (160, 320)
+ASPECT = (4, 3)
+FORMATS = ('webp', 'avif')
+QUALITY = {'webp': 80, 'avif': 60}
+
+# The resource Congo picks as the thumbnail ("*thumb*")
+THUMBNAIL_PATTERN = '*thumb*'
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+
+EXIF_ORIENTATION = 0x0112
+
+# Public path of the output directory on the site
+URL_PREFIX = '/thumbnails'
+
+
+def setup_thumbnails(blog_dir, media_index_file=MEDIA_INDEX_FILE):
     """Rename attachment.jpg files to thumbnail.jpg."""
     blog_path = Path(blog_dir)
 
+    media_index = load_media_index(media_index_file)
+    if media_index is None:
+        print(f"⚠️  No media index at {media_index_file}, run media_index.py to check for missing images")
+    images = folder_uploads(media_index, IMAGE_KINDS)
+
     renamed = 0
     skipped = 0
 
@@ -50,13 +89,199 @@ def setup_thumbnails(blog_dir):
         except Exception as e:
             print(f"❌ Error in {folder.name}: {e}")
 
+    # Checked after renaming, so attachments that just became thumbnails count
+    missing = sorted(folder for folder in images
+                     if (blog_path / folder).is_dir() and thumbnail_file(blog_path / folder) is None)
+    for folder in missing:
+        print(f"⚠️  No thumbnail: {folder} ({len(images[folder])} LinkedIn image uploads)")
+
     print(f"\n{'='*60}")
     print(f"Renamed: {renamed} images")
     print(f"Skipped: {skipped} images")
+    print(f"Image uploads without a thumbnail: {len(missing)}")
+    print(f"{'='*60}")
+
+
+def thumbnail_file(folder: Path) -> Optional[Path]:
+    """The image Congo uses as a bundle's thumbnail, if any."""
+    return next((path for path in sorted(folder.glob(THUMBNAIL_PATTERN))
+                 if path.suffix.lower() in IMAGE_SUFFIXES), None)
+
+
+def variant_height(width: int) -> int:
+    return round(width * ASPECT[1] / ASPECT[0])
+
+
+def variant_cache_file(digest: str, width: int, fmt: str) -> Path:
+    """Content-addressed cache location of one encoded variant."""
+    return VARIANT_CACHE / digest[:2] / f'{digest}-{width}x{variant_height(width)}-q{QUALITY[fmt]}.{fmt}'
+
+
+def variant_widths(source_size: Tuple[int, int], widths: Sequence[int]) -> List[int]:
+    """Target widths for a source, never upscaling the cropped area."""
+    source_width, source_height = source_size
+    largest = min(source_width, source_height * ASPECT[0] // ASPECT[1])
+    return sorted({min(width, largest) for width in widths})
+
+
+def encode_variant(task: Tuple[str, str, int, str]) -> Optional[str]:
+    """Crop, resize and encode one variant into the cache; returns an error or None."""
+    source, cache_file, width, fmt = task
+    cache_file = Path(cache_file)
+    tmp = cache_file.with_name(f'.{cache_file.name}.tmp')
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image = ImageOps.fit(image, (width, variant_height(width)), Image.LANCZOS)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            image.save(tmp, format=fmt.upper(), quality=QUALITY[fmt])
+        os.replace(tmp, cache_file)
+        return None
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        return str(e)
+
+
+def _link_variant(cache_file: Path, target: Path):
+    """Place a cached variant in the output tree without copying if possible."""
+    if target.exists():
+        if os.path.samefile(cache_file, target):
+            return
+        target.unlink()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(cache_file, target)
+    except OSError:
+        shutil.copy2(cache_file, target)
+
+
+def build_variants(blog_dir, output_dir, data_file: Optional[str] = None,
+                   widths: Sequence[int] = WIDTHS, formats: Sequence[str] = FORMATS,
+                   jobs: int = 1):
+    """Encode resized variants of every bundle thumbnail into output_dir."""
+    blog_path = Path(blog_dir)
+    output_path = Path(output_dir)
+
+    supported = []
+    for fmt in formats:
+        if features.check(fmt):
+            supported.append(fmt)
+        else:
+            print(f"⚠️  Pillow has no {fmt} support, skipping {fmt} variants")
+    formats = supported
+
+    # Source hashes are only recomputed for thumbnails that changed
+    manifest = RunManifest(manifest_path('setup_thumbnails'), '2')
+
+    tasks = []
+    placements = []
+    variants: Dict[str, List[Dict]] = {}
+    cached = 0
+
+    for folder in list_post_folders(blog_path):
+        source = thumbnail_file(folder)
+        if source is None:
+            continue
+
+        digest = manifest.digest(source)
+        if digest is None:
+            with open(source, 'rb') as f:
+                digest = content_digest(f.read())
+            manifest.record(source, digest=digest)
+
+        try:
+            with Image.open(source) as image:
+                source_size = image.size
+                # EXIF orientations 5-8 are rotated a quarter turn
+                if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                    source_size = source_size[::-1]
+        except Exception as e:
+            print(f"❌ Error in {folder.name}: {e}")
+            continue
+
+        for width in variant_widths(source_size, widths):
+            for fmt in formats:
+                cache_file = variant_cache_file(digest, width, fmt)
+                if cache_file.exists():
+                    cached += 1
+                else:
+                    tasks.append((str(source), str(cache_file), width, fmt))
+
+                name = f'thumbnail-{width}.{fmt}'
+                placements.append((cache_file, output_path / folder.name / name))
+                variants.setdefault(folder.name, []).append({
+                    'src': f'{URL_PREFIX}/{folder.name}/{name}',
+                    'width': width,
+                    'height': variant_height(width),
+                    'format': fmt,
+                })
+
+    manifest.save()
+
+    print(f"Encoding {len(tasks)} variants ({cached} cached)\n")
+
+    failed = set()
+    for task, error in zip(tasks, map_posts(encode_variant, tasks, jobs=jobs)):
+        folder_name = Path(task[0]).parent.name
+        if error:
+            print(f"❌ Error in {folder_name}: {error}")
+            failed.add(task[1])
+        else:
+            print(f"✅ Encoded: {folder_name}/thumbnail-{task[2]}.{task[3]}")
+
+    for cache_file, target in placements:
+        if str(cache_file) not in failed:
+            _link_variant(cache_file, target)
+
+    if data_file:
+        Path(data_file).parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(variants, indent=1, sort_keys=True).encode('utf-8')
+        write_if_changed(data_file, data, fsync=False)
+
+    print(f"\n{'='*60}")
+    print(f"Thumbnails: {len(variants)} images")
+    print(f"Encoded: {len(tasks) - len(failed)} variants")
+    print(f"Reused from cache: {cached} variants")
+    print(f"Failed: {len(failed)} variants")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
-    print("Setting up thumbnails for image previews...\n")
-    setup_thumbnails(blog_dir)
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--output', default=f'{site_dir}/static/thumbnails',
+                        help=f'where the variants are published ({URL_PREFIX} on the site)')
+    parser.add_argument('--data', default=f'{site_dir}/data/thumbnails.json',
+                        help='Hugo data file listing the variants of each post')
+    parser.add_argument('--widths', default=','.join(map(str, WIDTHS)),
+                        help='comma-separated variant widths in pixels')
+    parser.add_argument('--formats', default=','.join(FORMATS),
+                        help='comma-separated variant formats')
+    parser.add_argument('--media-index', default=str(MEDIA_INDEX_FILE),
+                        help='upload mapping from media_index.py')
+    parser.add_argument('--rename-only', action='store_true',
+                        help='only rename attachments, without building variants')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    widths = [int(width) for width in args.widths.split(',') if width.strip()]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in QUALITY]
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(unknown)}")
+
+    with session(args, 'setup_thumbnails'):
+        print("Setting up thumbnails for image previews...\n")
+        setup_thumbnails(args.blog_dir, args.media_index)
+
+        if not args.rename_only:
+            print("\nBuilding thumbnail variants...\n")
+            build_variants(args.blog_dir, args.output, args.data, widths, formats, jobs=args.jobs)
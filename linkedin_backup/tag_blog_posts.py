@@ -3,15 +3,17 @@
 Script to automatically assign tags to blog posts based on content analysis.
 """
 
-import os
-import re
+from functools import partial
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List, Set, Tuple
 
-
-def is_date_folder(folder_name):
-    """Check if folder name matches date-title pattern."""
-    return bool(re.match(r'^\d{4}-\d{2}-\d{2}-', folder_name))
+from atomic_writer import BatchWriter, journal_path
+from corpus import (Post, PostResult, list_post_folders, map_posts, read_post,
+                    set_tags_line, write_post)
+from import_shares import SKIP_LIST_FILE, load_skip_list
+from keyword_matcher import MATCHER_VERSION, KeywordMatcher
+from manifest import RunManifest, content_digest, manifest_path, rules_fingerprint
+from profiling import PROFILER, add_profile_arguments, session
 
 
 # Define tag keywords - when these words appear, suggest these tags
@@ -70,125 +72,117 @@ PATTERNS = {
 }
 
 
-def extract_content(file_path: Path) -> tuple[str, str, str]:
-    """Extract title, description, and body content from markdown file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+# One compiled, word-bounded regex for every keyword and pattern
+MATCHER = KeywordMatcher(TAG_KEYWORDS, PATTERNS)
 
-    # Extract front matter
-    parts = content.split('---', 2)
-    if len(parts) < 3:
-        return '', '', ''
+# Editing the keyword tables re-tags every post on the next run
+RULES_VERSION = rules_fingerprint(TAG_KEYWORDS, PATTERNS, MATCHER_VERSION)
 
-    front_matter = parts[1]
-    body = parts[2].strip()
 
-    # Extract title
-    title_match = re.search(r'title:\s*["\']?([^"\']+)["\']?', front_matter)
-    title = title_match.group(1) if title_match else ''
+def extract_content(post: Post) -> tuple[str, str, str]:
+    """Extract title, description, and body content from a parsed post."""
+    if not post.has_front_matter:
+        return '', '', ''
 
-    # Extract description
-    desc_match = re.search(r'description:\s*["\']?([^"\']+)["\']?', front_matter)
-    description = desc_match.group(1) if desc_match else ''
+    return post.title.lower(), post.description.lower(), post.body.strip().lower()
 
-    return title.lower(), description.lower(), body.lower()
+
+def tag_hits(title: str, description: str, body: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Find every keyword and pattern hit, with positions, in one pass."""
+    all_text = f"{title} {description} {body}"
+    return MATCHER.find_all(all_text)
 
 
 def suggest_tags(title: str, description: str, body: str) -> Set[str]:
     """Suggest tags based on content analysis."""
-    suggested_tags = set()
+    return set(tag_hits(title, description, body))
 
-    # Combine all text for analysis
-    all_text = f"{title} {description} {body}"
-
-    # Check for keyword matches
-    for tag, keywords in TAG_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword.lower() in all_text:
-                suggested_tags.add(tag)
-                break  # Found one keyword for this tag, move to next tag
 
-    # Check for specific patterns
-    for tag, pattern in PATTERNS.items():
-        if re.search(pattern, all_text, re.IGNORECASE):
-            suggested_tags.add(tag)
+def get_current_tags(post: Post) -> List[str]:
+    """Extract current tags from the front matter."""
+    return post.tags
 
-    return suggested_tags
 
+def tags_front_matter(front_matter: str, new_tags: List[str]) -> str:
+    """Set the sorted tags list in a front matter block."""
+    # Format tags as YAML list
+    tags_str = ', '.join([f'"{tag}"' for tag in sorted(new_tags)])
+    return set_tags_line(front_matter, f'tags: [{tags_str}]')
 
-def get_current_tags(file_path: Path) -> List[str]:
-    """Extract current tags from the front matter."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    parts = content.split('---', 2)
-    if len(parts) < 3:
-        return []
+def merged_tags(post: Post) -> tuple[List[str], List[str]]:
+    """Current tags and current tags combined with suggested ones, sorted."""
+    # Extract content
+    title, description, body = extract_content(post)
 
-    front_matter = parts[1]
+    # Get current tags
+    current_tags = get_current_tags(post)
 
-    # Look for tags or topics field
-    tags_match = re.search(r'(tags|topics):\s*\[(.*?)\]', front_matter, re.DOTALL)
-    if tags_match:
-        tags_str = tags_match.group(2)
-        # Extract quoted strings
-        tags = re.findall(r'["\']([^"\']+)["\']', tags_str)
-        return tags
+    # Suggest new tags
+    with PROFILER.stage('suggest_tags'):
+        suggested_tags = suggest_tags(title, description, body)
 
-    return []
+    # Combine with existing tags (keep existing ones)
+    return current_tags, sorted(set(current_tags) | suggested_tags)
 
 
-def update_tags(file_path: Path, new_tags: List[str]) -> bool:
+def update_tags(post: Post, new_tags: List[str]) -> bool:
     """Update the tags in the front matter."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    parts = content.split('---', 2)
-    if len(parts) < 3:
+    if not post.has_front_matter:
         print(f"  ⚠️  Invalid front matter format")
         return False
 
-    front_matter = parts[1]
-    body = parts[2]
+    # Reconstruct the file
+    write_post(post, f"---{tags_front_matter(post.front_matter, new_tags)}---{post.body}")
 
-    # Format tags as YAML list
-    tags_str = ', '.join([f'"{tag}"' for tag in sorted(new_tags)])
-    tags_line = f'tags: [{tags_str}]'
-
-    # Check if tags/topics already exist
-    if re.search(r'(tags|topics):', front_matter):
-        # Replace existing tags/topics
-        front_matter = re.sub(
-            r'(tags|topics):\s*\[.*?\]',
-            tags_line,
-            front_matter,
-            flags=re.DOTALL
-        )
-    else:
-        # Add tags after description or at the end
-        if 'description:' in front_matter:
-            # Find description line and add tags after it
-            lines = front_matter.split('\n')
-            new_lines = []
-            for i, line in enumerate(lines):
-                new_lines.append(line)
-                if line.strip().startswith('description:'):
-                    new_lines.append(tags_line)
-            front_matter = '\n'.join(new_lines)
-        else:
-            # Add at the end of front matter
-            front_matter = front_matter.rstrip() + f'\n{tags_line}\n'
+    return True
 
-    # Reconstruct the file
-    new_content = f"---{front_matter}---{body}"
 
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+def tag_post(index_file: Path, dry_run: bool = False) -> PostResult:
+    """Suggest and apply tags for a single post."""
+    folder_name = index_file.parent.name
 
-    return True
+    if not index_file.exists():
+        return PostResult(folder_name, 'missing', [f"⚠️  No index.md in {folder_name}"])
+
+    try:
+        # Read and parse the post once
+        post = read_post(index_file)
+
+        current_tags, final_tags = merged_tags(post)
 
+        if not final_tags:
+            return PostResult(folder_name, 'skipped', [f"⏭️  No tags for: {folder_name}"],
+                              content_digest(post.content.encode('utf-8')))
 
-def process_blog_posts(blog_dir: str, dry_run: bool = False):
+        # Check if tags changed
+        if set(current_tags) == set(final_tags):
+            return PostResult(folder_name, 'skipped', [f"⏭️  No change: {folder_name}"],
+                              content_digest(post.content.encode('utf-8')))
+
+        if dry_run:
+            return PostResult(folder_name, 'would_update', [
+                f"🔍 Would update {folder_name}",
+                f"   Current: {current_tags}",
+                f"   New: {final_tags}",
+            ])
+
+        if not post.has_front_matter:
+            return PostResult(folder_name, 'failed', [f"❌ Failed: {folder_name}"])
+
+        # New content for the main process to write
+        new_content = f"---{tags_front_matter(post.front_matter, final_tags)}---{post.body}"
+        return PostResult(folder_name, 'updated', [
+            f"✅ Updated: {folder_name}",
+            f"   Tags: {final_tags}",
+        ], content_digest(new_content.encode('utf-8')), new_content)
+
+    except Exception as e:
+        return PostResult(folder_name, 'error', [f"❌ Error processing {folder_name}: {e}"])
+
+
+def process_blog_posts(blog_dir: str, dry_run: bool = False, force: bool = False,
+                       jobs: int = 1, skip_list_file=None):
     """Process all blog posts and assign tags."""
     blog_path = Path(blog_dir)
 
@@ -199,82 +193,102 @@ def process_blog_posts(blog_dir: str, dry_run: bool = False):
     processed = 0
     updated = 0
     skipped = 0
+    unchanged = 0
+    duplicates = 0
 
-    # Collect all folders first
-    folders = [f for f in sorted(blog_path.iterdir()) if f.is_dir() and is_date_folder(f.name)]
-
-    print(f"Found {len(folders)} blog posts to process\n")
-
-    for folder in folders:
-        folder_name = folder.name
-        index_file = folder / 'index.md'
+    manifest = RunManifest(manifest_path('tag_blog_posts'), RULES_VERSION, reset=force)
 
-        if not index_file.exists():
-            print(f"⚠️  No index.md in {folder_name}")
-            continue
+    # Collect all folders first
+    folders = list_post_folders(blog_path)
 
-        try:
-            # Extract content
-            title, description, body = extract_content(index_file)
+    # Near-duplicates of another bundle are left untagged
+    skip_posts = load_skip_list(skip_list_file)['posts'] if skip_list_file else set()
 
-            # Get current tags
-            current_tags = get_current_tags(index_file)
+    print(f"Found {len(folders)} blog posts to process\n")
 
-            # Suggest new tags
-            suggested_tags = suggest_tags(title, description, body)
+    # Manifest entries are recorded once the writes are committed
+    finished = []
+
+    # A dry run neither writes nor journals
+    journal = None if dry_run else journal_path('tag_blog_posts')
+
+    with BatchWriter(journal, resume=not force) as writer:
+        if writer.resumed:
+            print(f"Resuming interrupted run: {len(writer.resumed)} posts already done\n")
+
+        # Skip posts untouched since the last run
+        pending = []
+        for folder in folders:
+            index_file = folder / 'index.md'
+            if folder.name in skip_posts:
+                duplicates += 1
+            elif manifest.is_unchanged(index_file):
+                unchanged += 1
+            elif writer.is_done(index_file):
+                unchanged += 1
+                finished.append((index_file, writer.done_digest(index_file)))
+            else:
+                pending.append(index_file)
 
-            # Combine with existing tags (keep existing ones)
-            all_tags = set(current_tags) | suggested_tags
+        # Results come back in folder order, even with a process pool
+        worker = partial(tag_post, dry_run=dry_run)
+        for result in map_posts(worker, pending, jobs=jobs):
+            for message in result.messages:
+                print(message)
 
-            if not all_tags:
-                print(f"⏭️  No tags for: {folder_name}")
-                skipped += 1
-                processed += 1
+            if result.status in ('missing', 'error'):
                 continue
 
-            # Convert to sorted list
-            final_tags = sorted(all_tags)
-
-            # Check if tags changed
-            if set(current_tags) == set(final_tags):
-                print(f"⏭️  No change: {folder_name}")
+            index_file = blog_path / result.folder_name / 'index.md'
+            if result.status == 'skipped':
                 skipped += 1
-            else:
-                if dry_run:
-                    print(f"🔍 Would update {folder_name}")
-                    print(f"   Current: {current_tags}")
-                    print(f"   New: {final_tags}")
-                else:
-                    # Update the file
-                    if update_tags(index_file, final_tags):
-                        print(f"✅ Updated: {folder_name}")
-                        print(f"   Tags: {final_tags}")
-                        updated += 1
-                    else:
-                        print(f"❌ Failed: {folder_name}")
+            elif result.status == 'updated':
+                if writer.write(index_file, result.content.encode('utf-8')):
+                    updated += 1
 
+            if result.digest:
+                writer.mark_done(index_file, result.digest)
+                finished.append((index_file, result.digest))
             processed += 1
 
-        except Exception as e:
-            print(f"❌ Error processing {folder_name}: {e}")
+    # A dry run must not mark posts as handled
+    if not dry_run:
+        for index_file, digest in finished:
+            manifest.record(index_file, digest=digest)
+        manifest.save()
 
     print(f"\n{'='*60}")
     print(f"Processed: {processed} blog posts")
     print(f"Updated: {updated} blog posts")
     print(f"Skipped (no changes): {skipped} blog posts")
+    print(f"Unchanged since last run: {unchanged} blog posts")
+    if skip_list_file:
+        print(f"Skipped as near-duplicates: {duplicates} blog posts")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    import sys
-
-    blog_dir = '/Users/oscarcortez/Documents/code/others/personal_site/content/blog'
-
-    # Check for dry-run flag
-    dry_run = '--dry-run' in sys.argv
-
-    if dry_run:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='show changes without modifying files')
+    parser.add_argument('--force', action='store_true',
+                        help='reprocess every post, ignoring the run manifest')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of worker processes')
+    parser.add_argument('--skip-list', nargs='?', const=str(SKIP_LIST_FILE),
+                        help='skip near-duplicate posts listed by near_duplicates.py '
+                             f'(default file: {SKIP_LIST_FILE})')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.dry_run:
         print("🔍 DRY RUN MODE - No files will be modified\n")
 
-    print(f"Analyzing and tagging blog posts in: {blog_dir}\n")
-    process_blog_posts(blog_dir, dry_run=dry_run)
+    print(f"Analyzing and tagging blog posts in: {args.blog_dir}\n")
+    with session(args, 'tag_blog_posts'):
+        process_blog_posts(args.blog_dir, dry_run=args.dry_run, force=args.force, jobs=args.jobs,
+                           skip_list_file=args.skip_list)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Persistent inverted tag index with incremental tag statistics.
+Keeps tag -> posts, a tag co-occurrence matrix and per-month counts on
+disk, updates them only for posts whose topics changed, and emits them as
+a Hugo data file for tag pages. tag_summary.py reads the same index built
+from blog_tags_mapping.json.
+"""
+
+import bisect
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, read_header
+from manifest import CACHE_DIR, RunManifest, manifest_path
+from profiling import PROFILER, add_profile_arguments, session
+
+
+TAG_INDEX_FILE = CACHE_DIR / 'tag_index.json'
+CURATED_INDEX_FILE = CACHE_DIR / 'tag_index_curated.json'
+
+# Bump when the stored layout changes; the index is rebuilt
+INDEX_VERSION = '1'
+
+# Related tags listed per tag in the Hugo data file
+RELATED_TAGS = 5
+
+# Tags sharing at least this share of their posts count as similar
+SIMILAR_JACCARD = 0.5
+
+
+def post_month(folder: str) -> str:
+    """YYYY-MM from a date-titled folder name."""
+    return folder[:7]
+
+
+def _unique(tags: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(tags))
+
+
+class TagIndex:
+    """Tag -> posts, co-occurrence and per-month counts, kept in step with
+    each post's tags."""
+
+    def __init__(self, posts: Optional[Dict[str, List[str]]] = None,
+                 tags: Optional[Dict[str, List[str]]] = None,
+                 cooccurrence: Optional[Dict[str, Dict[str, int]]] = None,
+                 months: Optional[Dict[str, Dict[str, int]]] = None):
+        self.posts = posts or {}
+        self.tags = tags or {}
+        self.cooccurrence = cooccurrence or {}
+        self.months = months or {}
+
+    @classmethod
+    def load(cls, index_file) -> 'TagIndex':
+        """Saved index, or an empty one if missing or of another version."""
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('version') != INDEX_VERSION:
+            return cls()
+        return cls(data['posts'], data['tags'], data['cooccurrence'], data['months'])
+
+    def save(self, index_file) -> bool:
+        Path(index_file).parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': INDEX_VERSION, 'posts': self.posts, 'tags': self.tags,
+                'cooccurrence': self.cooccurrence, 'months': self.months}
+        return write_if_changed(index_file, json.dumps(data, separators=(',', ':')).encode('utf-8'),
+                                fsync=False)
+
+    def _count(self, table: Dict[str, Dict[str, int]], outer: str, inner: str, delta: int):
+        row = table.setdefault(outer, {})
+        row[inner] = row.get(inner, 0) + delta
+        if not row[inner]:
+            del row[inner]
+            if not row:
+                del table[outer]
+
+    def _apply(self, folder: str, tags: List[str], delta: int):
+        """Add (delta=1) or remove (delta=-1) one post's contribution."""
+        month = post_month(folder)
+        for tag in tags:
+            folders = self.tags.setdefault(tag, [])
+            position = bisect.bisect_left(folders, folder)
+            if delta > 0:
+                folders.insert(position, folder)
+            else:
+                del folders[position]
+                if not folders:
+                    del self.tags[tag]
+
+            self._count(self.months, tag, month, delta)
+            for other in tags:
+                if other != tag:
+                    self._count(self.cooccurrence, tag, other, delta)
+
+    def set_post(self, folder: str, tags: Iterable[str]) -> bool:
+        """Record a post's tags; returns False if they did not change."""
+        tags = _unique(tags)
+        old = self.posts.get(folder)
+        if old == tags:
+            return False
+        if old:
+            self._apply(folder, old, -1)
+        self._apply(folder, tags, 1)
+        self.posts[folder] = tags
+        return True
+
+    def remove_post(self, folder: str) -> bool:
+        old = self.posts.pop(folder, None)
+        if old is None:
+            return False
+        self._apply(folder, old, -1)
+        return True
+
+    def counts(self) -> Dict[str, int]:
+        """Posts per tag."""
+        return {tag: len(folders) for tag, folders in self.tags.items()}
+
+    def related(self, tag: str, top: int = RELATED_TAGS) -> List[Tuple[str, int]]:
+        """Tags that appear together with tag most often."""
+        row = self.cooccurrence.get(tag, {})
+        return sorted(row.items(), key=lambda item: (-item[1], item[0]))[:top]
+
+    def similar_pairs(self, threshold: float = SIMILAR_JACCARD) -> List[Tuple[str, str, float]]:
+        """Tag pairs whose post sets overlap by at least threshold (Jaccard)."""
+        pairs = []
+        for tag, row in self.cooccurrence.items():
+            for other, shared in row.items():
+                if tag < other:
+                    union = len(self.tags[tag]) + len(self.tags[other]) - shared
+                    score = shared / union
+                    if score >= threshold:
+                        pairs.append((tag, other, score))
+        return sorted(pairs, key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    def hugo_data(self, top: int = RELATED_TAGS) -> Dict:
+        """Per-tag data for Hugo templates (site.Data.tags)."""
+        return {
+            tag: {
+                'count': len(folders),
+                'posts': list(reversed(folders)),
+                'related': [other for other, _ in self.related(tag, top)],
+                'months': dict(sorted(self.months.get(tag, {}).items())),
+            }
+            for tag, folders in sorted(self.tags.items())
+        }
+
+
+def update_from_posts(blog_dir: str, index_file=TAG_INDEX_FILE,
+                      full: bool = False) -> Tuple[TagIndex, int]:
+    """Bring the index up to date with the posts' front matter tags.
+
+    Only posts whose index.md changed since the last run are read, and only
+    their header. Returns the index and the number of posts whose tags changed.
+    """
+    index = TagIndex() if full else TagIndex.load(index_file)
+    manifest = RunManifest(manifest_path('tag_index'), INDEX_VERSION,
+                           reset=full or not index.posts)
+
+    changed = 0
+    seen = set()
+    for folder in list_post_folders(blog_dir):
+        index_file_md = folder / 'index.md'
+        if not index_file_md.exists():
+            continue
+        seen.add(folder.name)
+        if folder.name in index.posts and manifest.is_unchanged(index_file_md):
+            continue
+
+        header = read_header(index_file_md)
+        with PROFILER.stage('tag_index'):
+            if index.set_post(folder.name, header.tags if header else []):
+                changed += 1
+        manifest.record(index_file_md, hash_content=False)
+
+    for folder_name in [name for name in index.posts if name not in seen]:
+        index.remove_post(folder_name)
+        changed += 1
+
+    index.save(index_file)
+    manifest.save()
+    return index, changed
+
+
+def update_from_mapping(mapping_file: str, index_file=CURATED_INDEX_FILE) -> Tuple[TagIndex, int]:
+    """Bring the curated index up to date with blog_tags_mapping.json.
+
+    Only mapping entries that differ from the saved index are re-applied.
+    """
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        tag_mapping = json.load(f)
+
+    index = TagIndex.load(index_file)
+    changed = 0
+    with PROFILER.stage('tag_index'):
+        for folder_name, tags in tag_mapping.items():
+            if index.set_post(folder_name, tags):
+                changed += 1
+        for folder_name in [name for name in index.posts if name not in tag_mapping]:
+            index.remove_post(folder_name)
+            changed += 1
+
+    index.save(index_file)
+    return index, changed
+
+
+def write_hugo_data(index: TagIndex, data_file) -> bool:
+    Path(data_file).parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(index.hugo_data(), indent=1, ensure_ascii=False).encode('utf-8')
+    return write_if_changed(data_file, data, fsync=False)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    site_dir = '/Users/oscarcortez/Documents/code/others/personal_site'
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?', default=f'{site_dir}/content/blog')
+    parser.add_argument('--data', default=f'{site_dir}/data/tags.json',
+                        help='Hugo data file to write')
+    parser.add_argument('--full', action='store_true',
+                        help='rebuild the index from every post')
+    parser.add_argument('--tag',
+                        help='print the posts and related tags of one tag')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'tag_index'):
+        index, changed = update_from_posts(args.blog_dir, full=args.full)
+        written = write_hugo_data(index, args.data)
+
+    if args.tag:
+        print(f"🏷️  {args.tag}: {len(index.tags.get(args.tag, []))} posts")
+        for folder in index.tags.get(args.tag, []):
+            print(f"   • {folder}")
+        print(f"   Related: {', '.join(f'{tag} ({count})' for tag, count in index.related(args.tag))}")
+
+    print(f"\n{'='*60}")
+    print(f"Posts: {len(index.posts)}, tags: {len(index.tags)}")
+    print(f"Posts with changed tags: {changed}")
+    print(f"{'Updated' if written else 'Unchanged'}: {args.data}")
+    print(f"{'='*60}")
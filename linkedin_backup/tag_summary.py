@@ -3,22 +3,21 @@
 Analyze tag distribution from blog_tags_mapping.json
 """
 
-import json
 from collections import Counter
 
+from profiling import add_profile_arguments, session
+from tag_index import update_from_mapping
+
 
 def analyze_tags(mapping_file):
     """Analyze tag distribution."""
 
-    with open(mapping_file, 'r') as f:
-        tag_mapping = json.load(f)
-
-    # Count all tags
-    all_tags = []
-    for tags in tag_mapping.values():
-        all_tags.extend(tags)
+    # Counts come from the persistent tag index; only changed posts are re-counted
+    index, _ = update_from_mapping(mapping_file)
+    tag_mapping = index.posts
+    all_tags = [tag for tags in tag_mapping.values() for tag in tags]
 
-    tag_counts = Counter(all_tags)
+    tag_counts = Counter(index.counts())
 
     print("=" * 70)
     print("BLOG TAG ANALYSIS")
@@ -67,7 +66,22 @@ def analyze_tags(mapping_file):
         for tag in sorted(category_tags.keys(), key=lambda x: category_tags[x], reverse=True):
             print(f"  • {tag:30s} ({category_tags[tag]:3d} posts)")
 
+    print("\n" + "=" * 70)
+    print("SIMILAR TAGS (often used together)")
+    print("=" * 70)
+
+    for tag, other, score in index.similar_pairs():
+        print(f"  • {tag} / {other}: {score:.0%} of their posts shared")
+
 
 if __name__ == '__main__':
-    mapping_file = '/Users/oscarcortez/Documents/code/others/personal_site/blog_tags_mapping.json'
-    analyze_tags(mapping_file)
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('mapping_file', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/blog_tags_mapping.json')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'tag_summary'):
+        analyze_tags(args.mapping_file)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Suggest curated tags for blog posts with a TF-IDF model.
+Builds one sparse TF-IDF matrix over the corpus, learns a centroid per tag
+from blog_tags_mapping.json and scores every post against every tag with
+a single matrix multiply.
+"""
+
+import json
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from analyze_and_tag import iter_post_info
+from profiling import add_profile_arguments, session
+
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]*(?:[-'][a-z0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few
+for from further get got had has have having he her here hers him his how i if in
+into is it its itself just let me more most my no nor not now of off on once only
+or other our ours out over own same she should so some such than that the their
+theirs them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours
+""".split())
+
+# Fields that make up a post's text
+TEXT_FIELDS = ('folder', 'title', 'description', 'full_body')
+
+# Title words count more than body words
+TITLE_WEIGHT = 3
+
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SCORE = 0.1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words."""
+    return [token for token in TOKEN_RE.findall(text.lower())
+            if token not in STOP_WORDS and len(token) > 1]
+
+
+def post_tokens(post_info: Dict) -> List[str]:
+    """Tokens for a post, with the title and description weighted up."""
+    heading = tokenize(f"{post_info['title']} {post_info['description']}")
+    return heading * TITLE_WEIGHT + tokenize(post_info['full_body'])
+
+
+def tfidf_matrix(documents: Iterable[List[str]],
+                 vocabulary: Optional[Dict[str, int]] = None,
+                 idf: Optional[np.ndarray] = None) -> Tuple[sparse.csr_matrix, Dict[str, int], np.ndarray]:
+    """L2-normalized TF-IDF rows for tokenized documents.
+
+    Pass the vocabulary and idf of a fitted model to transform new documents;
+    unknown terms are dropped.
+    """
+    fit = vocabulary is None
+    if fit:
+        vocabulary = {}
+
+    indices = []
+    indptr = [0]
+    counts = []
+    for tokens in documents:
+        term_counts = Counter(tokens)
+        for term, count in term_counts.items():
+            column = vocabulary.get(term)
+            if column is None:
+                if not fit:
+                    continue
+                column = vocabulary[term] = len(vocabulary)
+            indices.append(column)
+            counts.append(count)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(indptr) - 1, len(vocabulary)),
+    )
+
+    # Sublinear term frequency
+    matrix.data = 1.0 + np.log(matrix.data)
+
+    if idf is None:
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1.0
+    matrix = matrix @ sparse.diags(idf)
+
+    return normalize_rows(matrix), vocabulary, idf
+
+
+def normalize_rows(matrix) -> sparse.csr_matrix:
+    """Scale every row to unit L2 norm, leaving empty rows empty."""
+    matrix = sparse.csr_matrix(matrix)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+class TfidfTagger:
+    """TF-IDF model with one centroid per curated tag."""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray,
+                 tags: List[str], centroids: sparse.csr_matrix):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.tags = tags
+        self.centroids = centroids
+
+    @classmethod
+    def fit(cls, documents: Dict[str, List[str]], tag_mapping: Dict[str, List[str]]) -> 'TfidfTagger':
+        """Learn the vocabulary from all documents and tag centroids from the mapping."""
+        names = list(documents)
+        matrix, vocabulary, idf = tfidf_matrix(documents[name] for name in names)
+
+        tags = sorted({tag for tags in tag_mapping.values() for tag in tags})
+        tag_columns = {tag: i for i, tag in enumerate(tags)}
+
+        # Post x tag indicator, so each centroid is a sum of its posts' rows
+        rows = []
+        columns = []
+        for i, name in enumerate(names):
+            for tag in tag_mapping.get(name, ()):
+                rows.append(i)
+                columns.append(tag_columns[tag])
+        indicator = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(names), len(tags))
+        )
+        centroids = normalize_rows(indicator.T @ matrix)
+
+        return cls(vocabulary, idf, tags, centroids)
+
+    def scores(self, documents: Iterable[List[str]]) -> np.ndarray:
+        """Cosine similarity of each document to each tag centroid."""
+        matrix, _, _ = tfidf_matrix(documents, self.vocabulary, self.idf)
+        return (matrix @ self.centroids.T).toarray()
+
+    def suggest(self, documents: Iterable[List[str]], top_k: int = DEFAULT_TOP_K,
+                min_score: float = DEFAULT_MIN_SCORE) -> List[List[str]]:
+        """Best scoring tags for each document."""
+        scores = self.scores(documents)
+        if scores.shape[1] == 0:
+            return [[] for _ in range(scores.shape[0])]
+
+        top_k = min(top_k, scores.shape[1])
+        best = np.argsort(-scores, axis=1)[:, :top_k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        return [
+            [self.tags[column] for column, score in zip(columns, row_scores) if score >= min_score]
+            for columns, row_scores in zip(best, best_scores)
+        ]
+
+
+def load_documents(blog_dir: str) -> Dict[str, List[str]]:
+    """Tokenized text of every post, by folder name."""
+    return {post_info['folder']: post_tokens(post_info)
+            for post_info in iter_post_info(blog_dir, TEXT_FIELDS)}
+
+
+def suggest_tags(blog_dir: str, mapping_file: str, output_file: str,
+                 top_k: int = DEFAULT_TOP_K, min_score: float = DEFAULT_MIN_SCORE,
+                 only_new: bool = False):
+    """Write suggested curated tags for the blog posts to output_file."""
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        tag_mapping = json.load(f)
+
+    start = time.perf_counter()
+    documents = load_documents(blog_dir)
+    loaded = time.perf_counter()
+
+    tagger = TfidfTagger.fit(documents, tag_mapping)
+
+    names = [name for name in documents if not (only_new and name in tag_mapping)]
+    suggestions = dict(zip(names, tagger.suggest((documents[name] for name in names),
+                                                 top_k, min_score)))
+    scored = time.perf_counter()
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(suggestions, f, indent=2)
+
+    for name, tags in suggestions.items():
+        curated = tag_mapping.get(name)
+        if curated is None:
+            print(f"🆕 {name}: {tags}")
+        elif set(tags) - set(curated):
+            print(f"🔍 {name}: {tags} (curated: {curated})")
+
+    print(f"\n{'='*60}")
+    print(f"Posts: {len(documents)}, vocabulary: {len(tagger.vocabulary)} terms, "
+          f"tags: {len(tagger.tags)}")
+    print(f"Suggested tags for: {len(suggestions)} blog posts")
+    print(f"Read posts: {loaded - start:.3f}s, fit and score: {scored - loaded:.3f}s")
+    print(f"Saved suggestions to {output_file}")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--mapping',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/blog_tags_mapping.json',
+                        help='curated blog_tags_mapping.json to learn tags from')
+    parser.add_argument('--output', default='blog_tags_suggested.json',
+                        help='where to save the suggested mapping')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help='maximum tags suggested per post')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE,
+                        help='minimum cosine similarity for a suggested tag')
+    parser.add_argument('--only-new', action='store_true',
+                        help='only suggest tags for posts missing from the mapping')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'tfidf_tagger'):
+        suggest_tags(args.blog_dir, args.mapping, args.output, args.top_k,
+                     args.min_score, only_new=args.only_new)
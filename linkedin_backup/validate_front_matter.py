@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Validate every bundle's front matter before Hugo sees it.
+Checks required keys, date format, the topics list syntax, quoting and
+escaping of string values, mixed tags/topics keys, and that images the post
+references exist in the bundle. Results are cached per post, so only posts
+(or bundle folders) that changed since the last run are validated again.
+Exits with status 1 if any post has errors, for use as a pre-commit hook.
+"""
+
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from atomic_writer import write_if_changed
+from corpus import list_post_folders, map_posts, parse_post
+from manifest import CACHE_DIR, rules_fingerprint
+from profiling import PROFILER, add_profile_arguments, session
+
+
+RESULTS_FILE = CACHE_DIR / 'front_matter_checks.json'
+
+# Bump when the checks change in ways the schema tables below don't capture
+RULES_VERSION = '1'
+
+REQUIRED_KEYS = ('title', 'date', 'draft', 'topics')
+# At least one key of each group must be present
+ONE_OF_KEYS = (('description', 'summary'),)
+DATE_KEYS = ('date', 'lastmod')
+BOOLEAN_KEYS = ('draft',)
+STRING_KEYS = ('title', 'description', 'summary')
+# The site's taxonomy; 'tags' is what the taggers write when they get it wrong
+TAGS_KEY = 'topics'
+OTHER_TAGS_KEY = 'tags'
+
+KEY_LINE_RE = re.compile(r'^([A-Za-z_][\w-]*):(.*)$')
+DATE_VALUE_RE = re.compile(
+    r'^(\d{4}-\d{2}-\d{2})(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$')
+DOUBLE_QUOTED_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+SINGLE_QUOTED_RE = re.compile(r"'(?:[^']|'')*'", re.DOTALL)
+# Valid YAML, but leaves a stray quote in the value; what fix_titles.py repairs
+QUOTE_ARTIFACT_RE = re.compile(r'\\""$')
+TOPICS_LIST_RE = re.compile(r'^\[\s*(?:"[^"\\]+"\s*(?:,\s*"[^"\\]+"\s*)*)?\]$')
+TOPIC_RE = re.compile(r'"([^"\\]+)"')
+
+# ![alt](path "title") - only the path is checked
+IMAGE_REF_RE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)')
+
+# Below this many posts to validate, a process pool costs more than it saves
+PARALLEL_MIN_POSTS = 32
+
+
+def rules_version() -> str:
+    return rules_fingerprint(RULES_VERSION, REQUIRED_KEYS, ONE_OF_KEYS, DATE_KEYS,
+                             BOOLEAN_KEYS, STRING_KEYS, TAGS_KEY)
+
+
+def parse_fields(front_matter: str) -> Tuple[Dict[str, str], List[str]]:
+    """Top-level keys and their raw values, plus structural errors.
+
+    Lines that are not 'key: value' continue the previous value, the way a
+    multi-line quoted scalar does.
+    """
+    fields = {}
+    errors = []
+    key = None
+    for line in front_matter.strip('\n').split('\n'):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        match = KEY_LINE_RE.match(line)
+        if match:
+            key = match.group(1)
+            if key in fields:
+                errors.append(f"duplicate key '{key}'")
+            fields[key] = match.group(2).strip()
+        elif key is None:
+            errors.append(f"line outside any key: {line.strip()[:40]!r}")
+        else:
+            fields[key] += '\n' + line.strip()
+    return fields, errors
+
+
+def check_fields(fields: Dict[str, str]) -> List[str]:
+    """Schema errors of parsed front matter fields."""
+    errors = []
+
+    for key in REQUIRED_KEYS:
+        if key not in fields and not (key == TAGS_KEY and OTHER_TAGS_KEY in fields):
+            errors.append(f"missing required key '{key}'")
+    for group in ONE_OF_KEYS:
+        if not any(key in fields for key in group):
+            errors.append(f"missing one of {', '.join(repr(key) for key in group)}")
+
+    for key in STRING_KEYS:
+        value = fields.get(key)
+        if value is None:
+            continue
+        if not value:
+            errors.append(f"{key}: empty value")
+        elif value[0] == '"' and not DOUBLE_QUOTED_RE.fullmatch(value):
+            errors.append(f"{key}: unbalanced or badly escaped quotes: {value[-20:]!r}")
+        elif value[0] == '"' and QUOTE_ARTIFACT_RE.search(value):
+            errors.append(f"{key}: ends in a \\\"\" artifact (run fix_titles.py)")
+        elif value[0] == "'" and not SINGLE_QUOTED_RE.fullmatch(value):
+            errors.append(f"{key}: unbalanced single quotes: {value[-20:]!r}")
+
+    for key in DATE_KEYS:
+        value = fields.get(key)
+        if value is None:
+            continue
+        value = value.strip('"\'')
+        match = DATE_VALUE_RE.match(value)
+        try:
+            valid = bool(match) and date.fromisoformat(match.group(1)) is not None
+        except ValueError:
+            valid = False
+        if not valid:
+            errors.append(f"{key}: {value!r} is not YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+
+    for key in BOOLEAN_KEYS:
+        value = fields.get(key)
+        if value is not None and value not in ('true', 'false'):
+            errors.append(f"{key}: {value!r} is not true or false")
+
+    if TAGS_KEY in fields and OTHER_TAGS_KEY in fields:
+        errors.append(f"mixes '{OTHER_TAGS_KEY}' and '{TAGS_KEY}' keys")
+    elif OTHER_TAGS_KEY in fields:
+        errors.append(f"uses '{OTHER_TAGS_KEY}' instead of '{TAGS_KEY}'")
+
+    for key in (TAGS_KEY, OTHER_TAGS_KEY):
+        value = fields.get(key)
+        if value is None:
+            continue
+        if not TOPICS_LIST_RE.match(value):
+            errors.append(f'{key}: expected a list like ["a", "b"], got {value[:40]!r}')
+            continue
+        topics = TOPIC_RE.findall(value)
+        duplicates = sorted({topic for topic in topics if topics.count(topic) > 1})
+        if duplicates:
+            errors.append(f"{key}: duplicate entries {', '.join(duplicates)}")
+
+    return errors
+
+
+def local_images(body: str) -> List[str]:
+    """Image paths in the body that should be files in the bundle."""
+    from urllib.parse import unquote
+
+    paths = []
+    for match in IMAGE_REF_RE.finditer(body):
+        path = match.group(1)
+        if '://' in path or path.startswith(('/', '#', 'data:')):
+            continue
+        paths.append(unquote(path.split('#', 1)[0].split('?', 1)[0]))
+    return paths
+
+
+def _stamp(index_file: Path, dirs) -> Optional[Dict]:
+    """Stats that must stay the same for a cached result to hold."""
+    folder = index_file.parent
+    try:
+        st = os.stat(index_file)
+        return {
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'dirs': {d: os.stat(folder / d).st_mtime_ns for d in sorted(dirs)},
+        }
+    except OSError:
+        return None
+
+
+def validate_post(index_file: Path) -> Tuple[str, List[str], Optional[Dict]]:
+    """(folder name, errors, stamp) of one post."""
+    folder = index_file.parent
+    # Stat first so an edit made while validating is never cached as valid
+    before = _stamp(index_file, ['.'])
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        PROFILER.read(len(content))
+    except (OSError, UnicodeDecodeError) as e:
+        return folder.name, [f"cannot read index.md: {e}"], None
+
+    post = parse_post(index_file, content)
+    if post.front_matter is None:
+        return folder.name, ["no front matter block"], before
+
+    with PROFILER.stage('validate'):
+        fields, errors = parse_fields(post.front_matter)
+        errors += check_fields(fields)
+        images = local_images(post.body)
+        for path in images:
+            if not (folder / path).is_file():
+                errors.append(f"missing image {path}")
+
+    # Adding or removing a referenced image changes its folder's mtime
+    dirs = {os.path.dirname(os.path.normpath(path)) or '.' for path in images} | {'.'}
+    dirs = {d for d in dirs if (folder / d).is_dir()}
+    unchanged = before is not None and before == _stamp(index_file, ['.'])
+    return folder.name, errors, _stamp(index_file, dirs) if unchanged else None
+
+
+def load_results(results_file) -> Dict:
+    try:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('rules_version') != rules_version():
+        return {}
+    return data.get('posts', {})
+
+
+def validate_blog(blog_dir: str, results_file=RESULTS_FILE, jobs: int = 1,
+                  force: bool = False) -> Tuple[Dict[str, List[str]], int]:
+    """Errors per post, and how many posts were validated (not cached)."""
+    cached = {} if force else load_results(results_file)
+    results = {}
+    stale = []
+
+    with PROFILER.stage('stat'):
+        for folder in list_post_folders(blog_dir):
+            index_file = folder / 'index.md'
+            entry = cached.get(folder.name)
+            if entry and entry['stamp'] == _stamp(index_file, entry['stamp']['dirs']):
+                results[folder.name] = entry
+            else:
+                stale.append(index_file)
+
+    if len(stale) < PARALLEL_MIN_POSTS:
+        jobs = 1
+    for folder_name, errors, stamp in map_posts(validate_post, stale, jobs):
+        # Without a stamp (changed or unreadable while checking) it is not cached
+        results[folder_name] = {'stamp': stamp, 'errors': errors}
+
+    if stale or results.keys() != cached.keys():
+        data = {'rules_version': rules_version(),
+                'posts': {name: entry for name, entry in results.items() if entry['stamp']}}
+        Path(results_file).parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(results_file, json.dumps(data, separators=(',', ':')).encode('utf-8'),
+                         fsync=False)
+
+    return {name: entry['errors'] for name, entry in sorted(results.items())}, len(stale)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--force', action='store_true',
+                        help='validate every post, ignoring cached results')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='worker processes when many posts changed')
+    parser.add_argument('--results', default=str(RESULTS_FILE),
+                        help='where cached results are kept')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with session(args, 'validate_front_matter'):
+        errors, validated = validate_blog(args.blog_dir, args.results, args.jobs, args.force)
+
+    invalid = {name: messages for name, messages in errors.items() if messages}
+    for name, messages in invalid.items():
+        print(f"❌ {name}")
+        for message in messages:
+            print(f"   • {message}")
+
+    print(f"\n{'='*60}")
+    print(f"Posts: {len(errors)} ({validated} validated, {len(errors) - validated} cached)")
+    print(f"Posts with errors: {len(invalid)}")
+    print(f"{'='*60}")
+    sys.exit(1 if invalid else 0)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Watch content/blog and fix bundles as soon as they are edited or added.
+Uses Linux inotify (falling back to polling elsewhere), debounces bursts
+of events and runs the formatting, title and tag steps of run_pipeline on
+the changed bundles only. The pipeline manifest records every write, so
+the watcher's own writes are recognized and never processed again.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from atomic_writer import write_if_changed
+from corpus import is_date_folder, list_post_folders
+from manifest import RunManifest, manifest_path
+from profiling import PROFILER, add_profile_arguments, session
+from run_pipeline import pipeline_rules_version, select_steps, transform_post
+
+
+# Wait this long after the last event before running, so an editor's
+# save or a copied-in bundle is handled once
+DEBOUNCE_SECONDS = 0.2
+POLL_INTERVAL = 1.0
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# Blog dir: new or moved-in bundles. Bundles: finished writes and renames.
+BLOG_MASK = IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+BUNDLE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_ONLYDIR
+
+EVENT = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """Changed bundle folders from inotify watches on the blog and each bundle."""
+
+    name = 'inotify'
+
+    def __init__(self, blog_path: Path):
+        self.blog_path = blog_path
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.folders: Dict[int, Path] = {}
+
+        self.blog_wd = self._add_watch(blog_path, BLOG_MASK)
+        for folder in list_post_folders(blog_path):
+            self._add_watch(folder, BUNDLE_MASK)
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        self.folders[wd] = path
+        return wd
+
+    def wait(self, timeout: Optional[float]) -> Set[Path]:
+        """Block up to timeout seconds (None: forever) for changed bundles."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; let the manifest sort out every bundle
+                    changed.update(list_post_folders(self.blog_path))
+                elif mask & IN_IGNORED:
+                    self.folders.pop(wd, None)
+                elif wd == self.blog_wd:
+                    if mask & IN_ISDIR and is_date_folder(name):
+                        folder = self.blog_path / name
+                        try:
+                            self._add_watch(folder, BUNDLE_MASK)
+                        except OSError:
+                            # Gone again before we got to it
+                            continue
+                        changed.add(folder)
+                elif name == 'index.md' and wd in self.folders:
+                    changed.add(self.folders[wd])
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Changed bundle folders from comparing index.md stats between scans."""
+
+    name = 'polling'
+
+    def __init__(self, blog_path: Path, interval: float = POLL_INTERVAL):
+        self.blog_path = blog_path
+        self.interval = interval
+        self.stats = self._scan()
+
+    def _scan(self) -> Dict[Path, Optional[tuple]]:
+        stats = {}
+        for folder in list_post_folders(self.blog_path):
+            try:
+                st = os.stat(folder / 'index.md')
+                stats[folder] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stats[folder] = None
+        return stats
+
+    def wait(self, timeout: Optional[float]) -> Set[Path]:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        stats = self._scan()
+        changed = {folder for folder, stat in stats.items()
+                   if stat is not None and self.stats.get(folder) != stat}
+        self.stats = stats
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(blog_path: Path, poll: bool = False, interval: float = POLL_INTERVAL):
+    """inotify watcher where available, polling otherwise."""
+    if not poll:
+        try:
+            return InotifyWatcher(blog_path)
+        except (OSError, AttributeError) as e:
+            # AttributeError: no inotify in this libc (macOS, BSD)
+            print(f"⚠️  inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(blog_path, interval)
+
+
+def process_bundles(folders: List[Path], steps: List[str], tag_mapping, manifest: RunManifest) -> int:
+    """Run the steps over changed bundles; returns how many were updated."""
+    start = time.perf_counter()
+    processed = 0
+    updated = 0
+
+    for folder in folders:
+        index_file = folder / 'index.md'
+
+        # Our own writes, touched files and unrelated files in the bundle
+        if not index_file.exists() or manifest.is_unchanged(index_file):
+            continue
+
+        with PROFILER.post(folder.name):
+            result = transform_post(index_file, steps, tag_mapping)
+            for message in result.messages:
+                print(message)
+
+            if result.status in ('missing', 'error'):
+                continue
+
+            if result.status == 'updated':
+                data = result.content.encode('utf-8')
+                write_if_changed(index_file, data)
+                manifest.record(index_file, data=data, digest=result.digest)
+                updated += 1
+            else:
+                manifest.record(index_file, digest=result.digest)
+            processed += 1
+
+    if processed:
+        manifest.save()
+        print(f"⚡ {processed} bundles in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+    return updated
+
+
+def watch_blog(blog_dir: str, steps: Optional[List[str]] = None,
+               mapping_file: Optional[str] = None, debounce: float = DEBOUNCE_SECONDS,
+               poll: bool = False, poll_interval: float = POLL_INTERVAL):
+    """Fix bundles as they change until interrupted."""
+    blog_path = Path(blog_dir)
+
+    if not blog_path.exists():
+        print(f"Error: Blog directory not found: {blog_dir}")
+        return
+
+    steps, tag_mapping = select_steps(steps, mapping_file)
+    manifest = RunManifest(manifest_path('run_pipeline'), pipeline_rules_version(steps, tag_mapping))
+
+    watcher = open_watcher(blog_path, poll, poll_interval)
+    print(f"👀 Watching {blog_path} with {watcher.name}: {' -> '.join(steps)} (Ctrl+C to stop)\n")
+
+    pending: Set[Path] = set()
+    deadline = None
+    updated = 0
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = watcher.wait(timeout)
+            if changed:
+                pending |= changed
+                deadline = time.monotonic() + debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                updated += process_bundles(sorted(pending), steps, tag_mapping, manifest)
+                pending.clear()
+                deadline = None
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        manifest.save()
+
+    print(f"\n{'='*60}")
+    print(f"Updated: {updated} blog posts")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from run_pipeline import DEFAULT_STEPS, STEPS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('blog_dir', nargs='?',
+                        default='/Users/oscarcortez/Documents/code/others/personal_site/content/blog')
+    parser.add_argument('--steps', default=','.join(DEFAULT_STEPS),
+                        help=f'comma-separated steps to run, from {",".join(STEPS)}')
+    parser.add_argument('--mapping',
+                        help='blog_tags_mapping.json to apply curated topics from')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help='seconds to wait for more events before running')
+    parser.add_argument('--poll', action='store_true',
+                        help='poll for changes instead of using inotify')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                        help='seconds between scans when polling')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    steps = [name.strip() for name in args.steps.split(',') if name.strip()]
+    unknown = [name for name in steps if name not in STEPS]
+    if unknown:
+        parser.error(f"Unknown steps: {', '.join(unknown)}")
+    if 'curated' in steps and not args.mapping:
+        parser.error("The curated step needs --mapping")
+
+    with session(args, 'watch_blog'):
+        watch_blog(args.blog_dir, steps, args.mapping, args.debounce, args.poll,
+                   args.poll_interval)
@@ -0,0 +1,100 @@
+// Client for the sharded index built by linkedin_backup/search_index.py.
+// Only meta.json, docs.json and the shards of the query terms are fetched.
+//
+//   const results = await searchIndex('time series forecasting');
+//   // [{url, title, date, score}, ...]
+
+const SEARCH_ROOT = '/search';
+
+let metaPromise = null;
+let docsPromise = null;
+const shardPromises = new Map();
+
+function fetchJson(path) {
+  return fetch(`${SEARCH_ROOT}/${path}`).then((response) => response.json());
+}
+
+function loadMeta() {
+  metaPromise = metaPromise || fetchJson('meta.json');
+  return metaPromise;
+}
+
+function loadDocs(meta) {
+  docsPromise = docsPromise || fetchJson(`docs.json?v=${meta.docs}`);
+  return docsPromise;
+}
+
+function loadShard(meta, key) {
+  const hash = meta.shards[key];
+  if (!hash) return Promise.resolve({});
+  if (!shardPromises.has(key)) shardPromises.set(key, fetchJson(`${key}.json?v=${hash}`));
+  return shardPromises.get(key);
+}
+
+function stem(meta, token) {
+  for (const rules of meta.stem_rules) {
+    for (const [suffix, replacement] of rules) {
+      if (token.endsWith(suffix) && token.length - suffix.length >= meta.min_stem) {
+        token = token.slice(0, token.length - suffix.length) + replacement;
+        break;
+      }
+    }
+  }
+  return token;
+}
+
+function queryTerms(meta, query) {
+  const stopWords = new Set(meta.stop_words);
+  const tokens = query.toLowerCase().match(new RegExp(meta.token_pattern, 'g')) || [];
+  const terms = tokens
+    .filter((token) => token.length >= meta.min_token_length && !stopWords.has(token))
+    .map((token) => stem(meta, token));
+  return [...new Set(terms)];
+}
+
+function shardKey(meta, term) {
+  return term.slice(0, meta.shard_prefix).replace(/[^a-z0-9]/g, '_');
+}
+
+// Postings are [gap, tf, gap, tf, ...] over increasing document ids
+function decodePostings(encoded) {
+  const postings = new Map();
+  let id = 0;
+  for (let i = 0; i < encoded.length; i += 2) {
+    id += encoded[i];
+    postings.set(id, encoded[i + 1]);
+  }
+  return postings;
+}
+
+export async function searchIndex(query, limit = 10) {
+  const meta = await loadMeta();
+  const terms = queryTerms(meta, query);
+  if (!terms.length) return [];
+
+  const shards = await Promise.all(terms.map((term) => loadShard(meta, shardKey(meta, term))));
+
+  // TF-IDF score, keeping only posts that contain every term
+  let scores = null;
+  terms.forEach((term, i) => {
+    const postings = decodePostings(shards[i][term] || []);
+    const idf = Math.log((1 + meta.documents) / (1 + postings.size)) + 1;
+    const next = new Map();
+    for (const [id, tf] of postings) {
+      if (scores === null || scores.has(id)) {
+        next.set(id, (scores ? scores.get(id) : 0) + (1 + Math.log(tf)) * idf);
+      }
+    }
+    scores = next;
+  });
+
+  const docs = await loadDocs(meta);
+  return [...scores]
+    .filter(([id]) => docs[id])
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, limit)
+    .map(([id, score]) => {
+      const [url, title, date] = docs[id];
+      return { url, title, date, score };
+    });
+}